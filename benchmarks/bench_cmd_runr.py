@@ -0,0 +1,153 @@
+import sys
+import os
+import json
+import argparse
+import tempfile
+import subprocess
+from time import perf_counter
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ssh_server import FakeSSHServer
+
+
+
+def make_config(workdir, port, nodes, commands, hops=0, cmd_timeout=0.5):
+    """
+    Description:
+        Writes config.txt and cmds.txt in workdir: a jumpbox on the fake server, hops intermediary
+        jumpboxes reached with ssh from the previous one, and nodes final nodes running commands commands each.
+    """
+    with open(os.path.join(workdir, "cmds.txt"), mode="wt", encoding="utf-8") as fp:
+        for i in range(commands):
+            fp.write(f"show command {i}\n")
+    with open(os.path.join(workdir, "config.txt"), mode="wt", encoding="utf-8") as fp:
+        fp.write(f"jump_cmd = ssh\nnode = 127.0.0.1\nport = {port}\nusername = bench\npassword = bench\nend\n\n")
+        for i in range(hops):
+            fp.write(f"jump_cmd = ssh\nnode = hop{i + 1}\nport = {port}\nusername = bench\npassword = bench\ncmd_timeout = {cmd_timeout}\nend\n\n")
+        fp.write("nodes = " + ", ".join(f"node{i + 1}" for i in range(nodes)) + "\n")
+        fp.write(f"cmd_files = cmds.txt\njump_cmd = ssh\nport = {port}\nusername = bench\npassword = bench\ncmd_timeout = {cmd_timeout}\nend\n")
+
+
+
+def peak_memory():
+    """
+    Description:
+        Returns the peak resident memory of the current process in MB, or None if it is not available.
+    """
+    if resource == None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+
+def run_case(case):
+    """
+    Description:
+        Runs boxjumper (or async_boxjumper) once against the fake server, in a child process so that its peak memory is its own.
+    Returns:
+        A dictionary of results.
+    """
+    from p_cmd_runr import p_cmd_runr as pcr
+    from p_cmd_runr import async_cmd_runr as acr
+    from p_cmd_runr import connection_pool as cp
+    from p_cmd_runr import profiler as pf
+
+    os.chdir(case["workdir"])
+    tracer = pf.Tracer()
+    pool = cp.ConnectionPool(tunnel=case["tunnel"]) if case["tunnel"] else None
+    cgo = pcr.ConfigGrabber("config.txt")
+    start = perf_counter()
+    if case["asyncio"]:
+        fp = acr.run(acr.async_boxjumper(cgo, len(cgo), blocking=case["blocking"], max_workers=case["jobs"], pool=pool, tracer=tracer))
+    else:
+        fp = pcr.boxjumper(cgo, len(cgo), blocking=case["blocking"], max_workers=case["jobs"], pool=pool, tracer=tracer)
+    elapsed = perf_counter() - start
+    if fp:
+        fp.close()
+    if pool != None:
+        pool.close()
+    latencies = [r["wall"] for r in tracer.records if r["event"] == "command"]
+    jumps = [r["wall"] for r in tracer.records if r["event"] == "jump"]
+    return {"elapsed": elapsed, "nodes_per_min": case["nodes"] * 60 / elapsed, "commands": len(latencies),
+            "cmd_mean": sum(latencies) / len(latencies) if latencies else None, "cmd_p95": percentile(latencies, 95),
+            "jump_mean": sum(jumps) / len(jumps) if jumps else None, "peak_mb": peak_memory()}
+
+
+
+def fmt(value, spec):
+    return "-" if value == None else format(value, spec)
+
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="bench_cmd_runr.py", description="end-to-end benchmark of boxjumper against a local fake ssh server")
+    parser.add_argument("-n", "--nodes", nargs="+", type=int, default=[1, 10, 50], help="numbers of final nodes to sweep. default is 1 10 50")
+    parser.add_argument("-m", "--modes", nargs="+", choices=["blocking", "non-blocking"], default=["blocking", "non-blocking"], help="command execution modes")
+    parser.add_argument("-j", "--jobs", type=int, default=10, help="maximum number of final nodes run concurrently. default is 10")
+    parser.add_argument("-c", "--commands", type=int, default=5, help="number of commands run on each node. default is 5")
+    parser.add_argument("-l", "--latency", type=float, default=0.05, help="time (in seconds) taken by each command on the fake server. default is 0.05")
+    parser.add_argument("-o", "--output_lines", type=int, default=10, help="number of lines output by each command. default is 10")
+    parser.add_argument("--hops", type=int, default=0, help="number of intermediary jumpboxes after the first one. default is 0")
+    parser.add_argument("--cmd_timeout", type=float, default=0.5, help="cmd_timeout of the nodes (used in non-blocking mode). default is 0.5")
+    parser.add_argument("-a", "--asyncio", action="store_true", help="use the asyncio engine")
+    parser.add_argument("--tunnel", action="store_true", help="use a connection pool in tunnel mode")
+    parser.add_argument("--save", help="save the results to a JSON file")
+    parser.add_argument("--baseline", help="JSON file saved by a previous run (with --save), to compare nodes/min against")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(json.loads(args.case))))
+        return
+
+    server = FakeSSHServer(latency=args.latency, output_lines=args.output_lines)
+    port = server.start()
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, mode="rt", encoding="utf-8") as fp:
+            baseline = {(r["mode"], r["nodes"]): r for r in json.load(fp)}
+
+    results = []
+    print(f"{'mode':<14}{'nodes':>7}{'time (s)':>10}{'nodes/min':>11}{'cmd mean (s)':>14}{'cmd p95 (s)':>13}{'jump mean (s)':>15}{'peak MB':>9}{'vs baseline':>13}")
+    for mode in args.modes:
+        for nodes in args.nodes:
+            with tempfile.TemporaryDirectory() as workdir:
+                make_config(workdir, port, nodes, args.commands, args.hops, args.cmd_timeout)
+                case = {"workdir": workdir, "nodes": nodes, "blocking": mode == "blocking", "jobs": args.jobs,
+                        "asyncio": args.asyncio, "tunnel": args.tunnel}
+                proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", json.dumps(case)],
+                                      stdout=subprocess.PIPE, universal_newlines=True)
+                if proc.returncode != 0:
+                    print(f"{mode:<14}{nodes:>7}  failed")
+                    continue
+                res = json.loads(proc.stdout.strip().splitlines()[-1])
+            res.update(mode=mode, nodes=nodes)
+            results.append(res)
+            change = ""
+            if (mode, nodes) in baseline:
+                change = f"{100 * (res['nodes_per_min'] / baseline[(mode, nodes)]['nodes_per_min'] - 1):+.1f}%"
+            print(f"{mode:<14}{nodes:>7}{res['elapsed']:>10.2f}{res['nodes_per_min']:>11.1f}{fmt(res['cmd_mean'], '.3f'):>14}"
+                  f"{fmt(res['cmd_p95'], '.3f'):>13}{fmt(res['jump_mean'], '.3f'):>15}{fmt(res['peak_mb'], '.1f'):>9}{change:>13}")
+    server.stop()
+    print(f"fake server: {server.counters}")
+    if args.save:
+        with open(args.save, mode="wt", encoding="utf-8") as fp:
+            json.dump(results, fp, indent=1)
+
+
+
+if __name__ == "__main__":
+    main()
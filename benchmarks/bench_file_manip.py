@@ -0,0 +1,122 @@
+import sys
+import os
+import argparse
+import random
+import shutil
+import tempfile
+import functools
+import math
+from time import perf_counter
+from p_cmd_runr import file_manip as fm
+
+
+
+# reduce based implementations of file_manip prior to the streaming filters, kept for comparison
+def legacy_count_from_end(s):
+    if s.rfind("\n") == -1:
+        return 0
+    i = s.rfind("\n")
+    if i == 0:
+        return 1
+    if i == len(s) - 1:
+        return 1 + legacy_count_from_end(s[0:-1])
+    return 0
+
+
+
+def legacy_deflate(s1, s2=""):
+    if not s2.strip():
+        return s1 + "\n"
+    count = legacy_count_from_end(s1)
+    count = math.ceil(count / 2)
+    return s1.rstrip() + count * "\n" + s2
+
+
+
+def legacy_file(filename, func):
+    res = ""
+    with open(filename, mode="rt", encoding="utf-8") as fp:
+        try:
+            lines = fp.readlines()
+            res = functools.reduce(func, lines)
+        except:
+            pass
+    with open(filename, mode="wt", encoding="utf-8") as fp:
+        fp.write(res)
+
+
+
+def legacy_flatten_file(filename):
+    with open(filename, mode="rt", encoding="utf-8") as fp:
+        lines = fm.flatten(fp.readlines())
+    with open(filename, mode="wt", encoding="utf-8") as fp:
+        for l in lines:
+            fp.write(l)
+
+
+
+LEGACY = {
+    "flatten_file": legacy_flatten_file,
+    "squeeze_file": lambda fn: legacy_file(fn, fm.squeeze),
+    "deflate_file": lambda fn: legacy_file(fn, legacy_deflate),
+}
+
+
+
+def make_log(filename, nlines, seed=0):
+    """
+    Description:
+        Writes a synthetic AMOS/MML style log of nlines lines, with runs of blank lines and trailing whitespace.
+    """
+    rnd = random.Random(seed)
+    with open(filename, mode="wt", encoding="utf-8") as fp:
+        n = 0
+        while n < nlines:
+            fp.write(f"ANBSP:B={rnd.randint(100, 999)}-{rnd.randint(1000, 9999)};  \n")
+            for _ in range(rnd.randint(1, 30)):
+                fp.write(f"{rnd.randint(1000, 99999)}-{rnd.randint(1000, 99999)}      RC={rnd.randint(0, 500)}   CC=1  \n")
+                fp.write("\n" * rnd.choice((0, 0, 1, 2, 3)))
+            fp.write("   \n\nEND\n\n\n\n")
+            n += 40
+
+
+
+def bench(func, src, workdir):
+    dst = os.path.join(workdir, "log.txt")
+    shutil.copyfile(src, dst)
+    start = perf_counter()
+    func(dst)
+    elapsed = perf_counter() - start
+    with open(dst, mode="rb") as fp:
+        return elapsed, fp.read()
+
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="bench_file_manip.py", description="compares the reduce based and streaming file_manip post-processors")
+    parser.add_argument("-l", "--lines", nargs="+", type=int, default=[5000, 20000, 50000], help="number of lines of the synthetic logs")
+    parser.add_argument("--no_legacy", action="store_true", help="only time the streaming versions (the legacy ones are quadratic)")
+    args = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 100000))
+
+    workdir = tempfile.mkdtemp()
+    try:
+        print(f"{'function':<14}{'lines':>10}{'MB':>8}{'legacy (s)':>12}{'stream (s)':>12}  identical")
+        for nlines in args.lines:
+            src = os.path.join(workdir, f"src_{nlines}.txt")
+            make_log(src, nlines)
+            size = os.path.getsize(src) / 2**20
+            for name, legacy in LEGACY.items():
+                new_time, new_res = bench(getattr(fm, name), src, workdir)
+                if args.no_legacy:
+                    print(f"{name:<14}{nlines:>10}{size:>8.1f}{'-':>12}{new_time:>12.3f}  -")
+                    continue
+                old_time, old_res = bench(legacy, src, workdir)
+                print(f"{name:<14}{nlines:>10}{size:>8.1f}{old_time:>12.3f}{new_time:>12.3f}  {old_res == new_res}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+
+if __name__ == "__main__":
+    main()
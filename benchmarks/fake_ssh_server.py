@@ -0,0 +1,282 @@
+import socket
+import logging
+import argparse
+import threading
+from time import sleep
+import paramiko
+
+
+
+class FakeServerInterface(paramiko.ServerInterface):
+    """
+    Description:
+        Accepts any login, interactive shells and direct-tcpip tunnels.
+    """
+    def __init__(self, server):
+        self.server = server
+        self.tunnels = {}
+
+
+    def get_allowed_auths(self, username):
+        return "password,publickey"
+
+
+    def check_auth_password(self, username, password):
+        self.server.count("logins")
+        return paramiko.AUTH_SUCCESSFUL
+
+
+    def check_auth_publickey(self, username, key):
+        self.server.count("logins")
+        return paramiko.AUTH_SUCCESSFUL
+
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+
+    def check_channel_direct_tcpip_request(self, chanid, origin, destination):
+        self.tunnels[chanid] = destination
+        return paramiko.OPEN_SUCCEEDED
+
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+
+    def check_channel_shell_request(self, channel):
+        shell = FakeShell(channel, self.server)
+        threading.Thread(target=shell.run, daemon=True).start()
+        return True
+
+
+
+class FakeShell:
+    """
+    Description:
+        Interactive shell of the fake server. It simulates:
+        - "ssh [-i key_file] [options] user@node [-p port]" hops, which ask for a password unless a key file is given.
+        - "amos node" (or moshell/mos) sessions, whose prompt is "node> ".
+        - "exit", which goes back to the previous node (or closes the shell on the first one).
+        - any other command, answered after latency seconds with output_lines lines of output.
+    """
+    def __init__(self, channel, server):
+        self.channel = channel
+        self.server = server
+        self.hosts = [(server.hostname, "$ ")]
+        self.pending = None
+
+
+    def prompt(self):
+        host, prompt = self.hosts[-1]
+        return f"{host}{prompt}"
+
+
+    def send(self, text):
+        data = text.encode("utf-8")
+        for i in range(0, len(data), 32768):
+            self.channel.sendall(data[i:i + 32768])
+
+
+    def run(self):
+        try:
+            self.send(self.prompt())
+            buf = ""
+            while True:
+                data = self.channel.recv(4096)
+                if not data:
+                    break
+                buf += data.decode("utf-8", errors="replace")
+                while "\n" in buf:
+                    line, buf = buf.split("\n", 1)
+                    if not self.handle(line.strip()):
+                        self.channel.close()
+                        return
+        except (OSError, EOFError, paramiko.SSHException):
+            pass
+
+
+    def handle(self, line):
+        """
+        Description:
+            Handles a line received from the client. Returns False once the shell is exited.
+        """
+        if self.pending:
+            self.hosts.append((self.pending, "$ "))
+            self.pending = None
+            self.send(f"\r\nLast login: from {self.hosts[-2][0]}\r\n{self.prompt()}")
+            return True
+        words = line.split()
+        if not words:
+            self.send(f"\r\n{self.prompt()}")
+            return True
+        if words[0] == "ssh":
+            host = [w for w in words[1:] if "@" in w]
+            host = host[0].split("@", 1)[1] if host else words[-1]
+            self.server.count("hops")
+            if "-i" in words:
+                self.hosts.append((host, "$ "))
+                self.send(f"{line}\r\n{self.prompt()}")
+            else:
+                self.pending = host
+                self.send(f"{line}\r\n{host}'s password: ")
+            return True
+        if words[0] in ("amos", "moshell", "mos") and len(words) > 1:
+            self.server.count("hops")
+            self.hosts.append((words[1], "> "))
+            self.send(f"{line}\r\nChecking ip contact...OK\r\n\r\n{self.prompt()}")
+            return True
+        if words[0] == "exit":
+            self.hosts.pop()
+            if not self.hosts:
+                self.send("logout\r\n")
+                return False
+            self.send(f"{line}\r\nConnection to {self.hosts[-1][0]} closed.\r\n{self.prompt()}")
+            return True
+
+        self.server.count("commands")
+        if self.server.latency:
+            sleep(self.server.latency)
+        host = self.hosts[-1][0]
+        body = "".join(f"{host} {line[:20]} {i:06d} {self.server.filler}\r\n" for i in range(self.server.output_lines))
+        self.send(f"{line}\r\n{body}\r\n{self.prompt()}")
+        return True
+
+
+
+class FakeSSHServer:
+    """
+    Description:
+        Paramiko based stand-in for the ssh jumpboxes and AMOS nodes, listening on localhost.
+        Every connection reaches the same fake shell, so that chained hops and any number of final nodes
+        can be simulated with a single server. direct-tcpip tunnels are connected back to the server itself.
+    """
+    def __init__(self, port=0, latency=0.05, output_lines=10, hostname="jumpbox"):
+        """
+        Description:
+            Initializer of a FakeSSHServer object.
+        Parameters:
+            - port port number to listen on. default is 0 (any free port).
+            - latency time (in seconds) taken by each command. default is 0.05 sec.
+            - output_lines number of lines (of about 80 characters) output by each command. default is 10.
+            - hostname prompt of the first node of a shell.
+        Returns:
+            FakeSSHServer object.
+        """
+        self.port = port
+        self.latency = latency
+        self.output_lines = output_lines
+        self.hostname = hostname
+        self.filler = "x" * 50
+        self.key = paramiko.RSAKey.generate(2048)
+        self.sock = None
+        self.lock = threading.Lock()
+        self.counters = {"connections": 0, "logins": 0, "hops": 0, "commands": 0, "tunnels": 0}
+
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+
+    def start(self):
+        """
+        Description:
+            Starts listening, and serves the connections in background threads.
+        Returns:
+            The port number the server listens on.
+        """
+        # clients that exit without closing their connections are expected, and are not worth a traceback
+        logging.getLogger("paramiko.transport").setLevel(logging.CRITICAL)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", self.port))
+        self.sock.listen(512)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self.serve, daemon=True).start()
+        return self.port
+
+
+    def stop(self):
+        """
+        Description:
+            Stops listening for new connections.
+        """
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+
+    def serve(self):
+        while self.sock:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                break
+            self.count("connections")
+            threading.Thread(target=self.handle, args=(client,), daemon=True).start()
+
+
+    def handle(self, client):
+        transport = paramiko.Transport(client)
+        transport.add_server_key(self.key)
+        interface = FakeServerInterface(self)
+        try:
+            transport.start_server(server=interface)
+        except (paramiko.SSHException, EOFError):
+            return
+        channels = []  # paramiko only keeps weak references to the accepted channels
+        while transport.is_active():
+            channel = transport.accept(1)
+            if channel is None:
+                continue
+            channels.append(channel)
+            if channel.get_id() in interface.tunnels:
+                self.count("tunnels")
+                sock = socket.create_connection(("127.0.0.1", self.port))
+                threading.Thread(target=pipe, args=(channel, sock), daemon=True).start()
+                threading.Thread(target=pipe, args=(sock, channel), daemon=True).start()
+
+
+
+def pipe(src, dst):
+    """
+    Description:
+        Copies data from src to dst (sockets or channels) until src is closed.
+    """
+    try:
+        while True:
+            data = src.recv(65536)
+            if not data:
+                break
+            dst.sendall(data)
+    except (OSError, EOFError):
+        pass
+    try:
+        dst.close()
+    except (OSError, EOFError):
+        pass
+
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="fake_ssh_server.py", description="paramiko based fake ssh/amos server, accepting any login on localhost")
+    parser.add_argument("-P", "--port", type=int, default=2222, help="port number to listen on. default is 2222")
+    parser.add_argument("-l", "--latency", type=float, default=0.05, help="time (in seconds) taken by each command. default is 0.05")
+    parser.add_argument("-o", "--output_lines", type=int, default=10, help="number of lines output by each command. default is 10")
+    args = parser.parse_args()
+    server = FakeSSHServer(args.port, args.latency, args.output_lines)
+    print(f"listening on 127.0.0.1:{server.start()}")
+    try:
+        while True:
+            sleep(10)
+            print(server.counters)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ import os
 import argparse
 from p_cmd_runr import p_cmd_runr as pcr
 from p_cmd_runr import file_manip as fm
+from find_overlap import overlap as ov
+from p_cmd_runr import indexed_log as il
 
 
 
@@ -20,12 +22,12 @@ def main():
     parser.add_argument("-t", "--timeout", help="sets command execution to non-blocking. default is blocking", action="store_true")
     parser.add_argument("-p", "--print_output", action="store_true", help="flag to print command output to the screen. default is not to print")
     parser.add_argument("-c", "--config", default="config.txt", help="name of configuration file. defaults to config.txt if not specified.")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of processes used to check the files for overlaps. large files are split in chunks. defaults to 1.")
+    parser.add_argument("-o", "--output", help="also write the overlaps to a report file. the report is in JSON format if its name ends with .json, otherwise in CSV format.")
     args = parser.parse_args()
 
     if args.local:
-        for fn in args.local:
-            print(f"Checking overlaps in {fn}")
-            find_overlap(fn)
+        overlaps = find_overlaps(args.local, args.jobs)
     else:
         print(f"Processing {args.filename}")
         inf = args.filename
@@ -40,28 +42,31 @@ def main():
         fp = pcr.boxjumper(cgo, len(cgo), print_output=args.print_output, blocking= not args.timeout)
         if fp:
             fp.close()
+        filenames = []
         for node in nodes:
             with os.scandir() as entries:
                 for entry in entries:
-                    if entry.name.startswith(node) and not entry.is_dir(follow_symlinks=False):
-                        print(f"Checking overlaps in {entry.name}")
-                        find_overlap(entry.name)
+                    if entry.name.startswith(node) and not entry.name.endswith(il.INDEX_SUFFIX) and not entry.is_dir(follow_symlinks=False):
+                        filenames.append(entry.name)
             entries.close()
+        overlaps = find_overlaps(filenames, args.jobs)
 
         pcr.move_to_tmp(nodes, fm.deflate_file)
+
+    if args.output:
+        ov.write_report(overlaps, args.output)
+        print(f"{len(overlaps)} overlap(s) written to {args.output}")
    
 
 
 def build_queries_from_definitions(infilename, outfilename="defs_to_query.txt", segment="ANBSI"):
-    dr = re.compile(segment + ":B=((\w+)-(\w+))", re.I)
+    dr = re.compile(segment + r":B=((\w+)-(\w+))", re.I)
 
     with open(outfilename, mode="wt", encoding="utf-8") as ofp:
         n = ofp.write("mml\n")
         with open(infilename, mode="rt", encoding="utf-8") as ifp:
             found = False
-            lines = ifp.readlines()
-            while(len(lines)):
-                line = lines.pop(0)
+            for line in ifp:
                 do = dr.search(line)
                 if do:
                     found = True
@@ -72,32 +77,24 @@ def build_queries_from_definitions(infilename, outfilename="defs_to_query.txt",
             if found:
                 ofp.write("exit;\nexit")
 
-        
 
-def find_overlap(filename):
-    rh = re.compile("ANBSP:B=((\w+)-(\w+))", re.I)
-    rp = re.compile("((\w+)-(\w+))\s+RC=(\w+)", re.I)
-    rq = re.compile("END", re.I)
-    rq2 = re.compile("^\s*$")
-    
-    with open(filename, mode="rt", encoding="utf-8") as fp:
-        lines = fp.readlines()
-        lines = fm.flatten(lines)
-        while(len(lines)):
-            line = lines.pop(0)
-            ho = rh.search(line)
-            if ho:
-                next_line = lines.pop(0)
-                while not (rq.search(next_line) or rq2.search(next_line)):
-                    po = rp.search(next_line)
-                    if po:
-                        if len(ho.group(1)) > len(po.group(1)):
-                            print("Overlap:\n{}\n{}\n".format(ho.group(0), po.group(0)))
-                    try:
-                        next_line = lines.pop(0)
-                    except:
-                        pass                    
-     
+
+def find_overlaps(filenames, jobs=1):
+    """
+    Description:
+        Indexes the ANBSP printouts of all the files, and prints the overlaps found in each of them under its name.
+    Parameters:
+        - filenames list of ANBSP printout files.
+        - jobs number of processes used to check the files. default is 1.
+    Returns:
+        A list of overlap.Overlap tuples.
+    """
+    overlaps = ov.scan_files(filenames, jobs)
+    for fn in filenames:
+        print(f"Checking overlaps in {fn}")
+        ov.print_overlaps([o for o in overlaps if o.source == fn])
+    return overlaps
+
 
 
 if __name__ == "__main__":
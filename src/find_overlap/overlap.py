@@ -0,0 +1,287 @@
+import re
+import io
+import os
+import csv
+import json
+import mmap
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from p_cmd_runr import indexed_log as il
+
+
+
+HEADER = re.compile(r"ANBSP:B=((\w+)-(\w+))", re.I)
+ROW = re.compile(r"((\w+)-(\w+))\s+RC=(\w+)", re.I)
+END = re.compile(r"END", re.I)
+BLANK = re.compile(r"^\s*$")
+HEADER_BYTES = re.compile(rb"ANBSP:B=\w+-\w+", re.I)
+MIN_CHUNK_SIZE = 1 << 20
+
+# a B-number definition (queried with ANBSP, rc is None) or an existing B-number entry printed by ANBSP
+BNumber = namedtuple("BNumber", ["source", "series", "digits", "rc", "text", "line"])
+
+Overlap = namedtuple("Overlap", ["source", "series", "definition", "entry", "rc", "definition_line", "entry_line", "header", "row"])
+
+
+
+def parse_printout(lines, source="", first_line=1):
+    """
+    Description:
+        Parses ANBSP printouts. Each ANBSP:B= header is a definition, and the B-number/RC rows printed
+        under it (up to the next END line) are existing entries.
+    Parameters:
+        - lines iterable of lines (such as a file object).
+        - source name of the printout (usually its filename).
+        - first_line line number of the first line.
+    Returns:
+        A (definitions, entries) tuple of BNumber lists.
+    """
+    definitions = []
+    entries = []
+    in_block = False
+    for n, line in enumerate(lines, start=first_line):
+        ho = HEADER.search(line)
+        if ho:
+            definitions.append(BNumber(source, ho.group(2).upper(), ho.group(3).upper(), None, ho.group(0), n))
+            in_block = True
+            continue
+        if not in_block:
+            continue
+        if BLANK.search(line):
+            continue
+        if END.search(line):
+            in_block = False
+            continue
+        po = ROW.search(line)
+        if po:
+            entries.append(BNumber(source, po.group(2).upper(), po.group(3).upper(), po.group(4), po.group(0), n))
+    return definitions, entries
+
+
+
+class OverlapIndex:
+    """
+    Description:
+        Sorted index of the B-number definitions and entries of one or more printouts.
+        A definition overlaps an entry of the same printout and series whose digits are a strict prefix of its own digits.
+    """
+    def __init__(self):
+        self.definitions = []
+        self.entries = []
+        self.seen = set()
+
+
+    def __len__(self):
+        return len(self.definitions) + len(self.entries)
+
+
+    def add(self, definitions, entries):
+        """
+        Description:
+            Adds definitions and entries to the index. Repeated definitions and entries of a printout are only kept once.
+        """
+        for d in definitions:
+            key = (d.source, d.series, d.digits, None)
+            if key not in self.seen:
+                self.seen.add(key)
+                self.definitions.append(d)
+        for e in entries:
+            key = (e.source, e.series, e.digits, e.rc)
+            if key not in self.seen:
+                self.seen.add(key)
+                self.entries.append(e)
+
+
+    def add_file(self, filename):
+        """
+        Description:
+            Parses an ANBSP printout file (which may be compressed) and adds its definitions and entries to the index.
+        """
+        with il.open_log(filename) as fp:
+            self.add(*parse_printout(fp, filename))
+
+
+    def overlaps(self):
+        """
+        Description:
+            Finds all the overlaps in a single pass over the sorted definitions and entries of each (printout, series).
+            The entries that are prefixes of the current B-number are kept on a stack, so the cost is O(n log n).
+        Returns:
+            A list of Overlap tuples sorted by printout, definition line and entry line.
+        """
+        groups = {}
+        for e in self.entries:
+            groups.setdefault((e.source, e.series), []).append((e.digits, 0, e))
+        for d in self.definitions:
+            groups.setdefault((d.source, d.series), []).append((d.digits, 1, d))
+
+        result = []
+        for items in groups.values():
+            items.sort(key=lambda i: (i[0], i[1], i[2].line))
+            stack = []
+            for digits, kind, b in items:
+                while stack and not digits.startswith(stack[-1].digits):
+                    stack.pop()
+                if kind == 0:
+                    stack.append(b)
+                    continue
+                for e in stack:
+                    if e.digits != digits:
+                        result.append(Overlap(b.source, b.series, f"{b.series}-{b.digits}", f"{e.series}-{e.digits}", e.rc, b.line, e.line, b.text, e.text))
+        result.sort(key=lambda o: (o.source, o.definition_line, o.entry_line))
+        return result
+
+
+
+def count_lines(data):
+    """
+    Description:
+        Counts the line breaks in data (bytes), the same way as when reading the file in text mode.
+    """
+    return data.count(b"\n") + data.count(b"\r") - data.count(b"\r\n")
+
+
+
+def split_file(filename, chunk_size):
+    """
+    Description:
+        Splits a printout file into chunks of about chunk_size bytes. Each chunk (but the first) starts
+        at the beginning of an ANBSP:B= header line, so that the chunks can be parsed independently.
+    Parameters:
+        - filename name of the printout file.
+        - chunk_size minimum size (in bytes) of a chunk.
+    Returns:
+        A list of (start, end, first_line) tuples. end is None for the last chunk.
+        Compressed files are not split.
+    """
+    chunks = []
+    if il.get_compression(filename):
+        return [(0, None, 1)]
+    with open(filename, mode="rb") as fp:
+        size = os.fstat(fp.fileno()).st_size
+        if size <= chunk_size:
+            return [(0, None, 1)]
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            first_line = 1
+            pos = chunk_size
+            while pos < size:
+                m = HEADER_BYTES.search(mm, pos)
+                if not m:
+                    break
+                boundary = max(mm.rfind(b"\n", start, m.start()), mm.rfind(b"\r", start, m.start())) + 1
+                eol = mm.find(b"\n", m.end())
+                if eol == -1:
+                    eol = len(mm)
+                line = mm[boundary:eol].decode("utf-8", errors="replace")
+                if boundary <= start or not HEADER.search(line):
+                    pos = m.end()
+                    continue
+                chunks.append((start, boundary, first_line))
+                first_line += count_lines(mm[start:boundary])
+                start = boundary
+                pos = start + chunk_size
+    chunks.append((start, None, first_line))
+    return chunks
+
+
+
+def parse_chunk(filename, start=0, end=None, first_line=1):
+    """
+    Description:
+        Parses a chunk of a printout file, read through mmap. Compressed files are parsed as a whole.
+    Returns:
+        A (definitions, entries) tuple of BNumber lists.
+    """
+    if il.get_compression(filename):
+        with il.open_log(filename) as fp:
+            return parse_printout(fp, filename)
+    with open(filename, mode="rb") as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            return [], []
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end].decode("utf-8")
+    return parse_printout(io.StringIO(text, newline=None), filename, first_line)
+
+
+
+def scan_task(task):
+    """
+    Description:
+        Process pool worker. A task is either a whole file, for which the overlaps are returned,
+        or a chunk of a large file, for which the parsed definitions and entries are returned.
+    """
+    filename, start, end, first_line = task
+    if start == 0 and end == None:
+        index = OverlapIndex()
+        index.add(*parse_chunk(filename))
+        return index.overlaps()
+    return parse_chunk(filename, start, end, first_line)
+
+
+
+def scan_files(filenames, jobs=1, chunk_size=None):
+    """
+    Description:
+        Finds the overlaps in several printout files.
+        With more than one job, files (and chunks of large files) are parsed in parallel by a process pool,
+        and the results are merged into the same sorted list as a single process would return.
+    Parameters:
+        - filenames list of printout files.
+        - jobs number of worker processes. default is 1 (no process pool).
+        - chunk_size size (in bytes) above which a file is split into chunks. default is the
+        size of a file divided by twice the number of jobs, with a minimum of 1 MB.
+    Returns:
+        A list of Overlap tuples sorted by printout, definition line and entry line.
+    """
+    if jobs <= 1:
+        index = OverlapIndex()
+        for fn in filenames:
+            index.add_file(fn)
+        return index.overlaps()
+
+    tasks = []
+    for fn in filenames:
+        size = chunk_size or max(MIN_CHUNK_SIZE, os.path.getsize(fn) // (jobs * 2))
+        tasks.extend((fn, start, end, first_line) for start, end, first_line in split_file(fn, size))
+
+    overlaps = []
+    index = None
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for task, res in zip(tasks, executor.map(scan_task, tasks)):
+            if task[1] == 0 and task[2] == None:
+                overlaps.extend(res)
+                continue
+            if task[1] == 0:
+                index = OverlapIndex()
+            index.add(*res)
+            if task[2] == None:
+                overlaps.extend(index.overlaps())
+    overlaps.sort(key=lambda o: (o.source, o.definition_line, o.entry_line))
+    return overlaps
+
+
+
+def print_overlaps(overlaps):
+    """
+    Description:
+        Prints the overlaps on the screen.
+    """
+    for o in overlaps:
+        print("Overlap:\n{}\n{}\n".format(o.header, o.row))
+
+
+
+def write_report(overlaps, filename):
+    """
+    Description:
+        Writes the overlaps to filename, as JSON if filename ends with .json, or as CSV otherwise.
+    """
+    with open(filename, mode="wt", encoding="utf-8", newline="") as fp:
+        if filename.lower().endswith(".json"):
+            json.dump([o._asdict() for o in overlaps], fp, indent=2)
+            fp.write("\n")
+        else:
+            writer = csv.writer(fp)
+            writer.writerow(Overlap._fields)
+            writer.writerows(overlaps)
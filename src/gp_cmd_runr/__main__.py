@@ -2,8 +2,15 @@ import re
 import sys
 import os
 import argparse
+from time import perf_counter
 from p_cmd_runr import p_cmd_runr as pcr
 from p_cmd_runr import file_manip as fm
+from p_cmd_runr import async_cmd_runr as acr
+from p_cmd_runr import connection_pool as cp
+from p_cmd_runr import profiler as pf
+from p_cmd_runr import quiet_cache as qc
+from p_cmd_runr import checkpoint as ck
+from p_cmd_runr import indexed_log as il
 
 
 
@@ -27,9 +34,26 @@ ARISING OUT OF OR IN CONNECTION WITH THE USE OF THIS SCRIPT.""")
     parser.add_argument("-d", "--dry_run", help="display loaded configuration, but do not execute", action="store_true")
     parser.add_argument("-t", "--timeout", help="sets command execution to non-blocking. default is blocking", action="store_true")
     parser.add_argument("-p", "--print_output", action="store_true", help="flag to print command output to the screen. default is not to print")
+    parser.add_argument("-a", "--asyncio", action="store_true", help="run the nodes with the asyncio engine, which moves on to the next command as soon as a prompt is detected. default is the threaded engine")
+    parser.add_argument("-j", "--jobs", type=int, help="maximum number of final nodes to run commands on concurrently. default is 1 with the threaded engine, and no limit with the asyncio engine (-a)")
+    parser.add_argument("--tunnel", action="store_true", help="reach ssh hops through direct-tcpip tunnels on the previous node's connection. key files are then read locally. default is to run ssh on the previous node")
+    parser.add_argument("--idle_timeout", type=float, default=300, help="time (in seconds) after which an unused ssh connection is closed (best-effort: idle connections are checked periodically). connections are shared across configuration files. default is 300")
+    parser.add_argument("--adaptive", nargs="?", const=qc.DEFAULT_CACHE, metavar="CACHE", help="in non-blocking mode, consider a command finished once its output has been quiet for the interval learned from the previous runs (kept in CACHE, default quiet_cache.json). cmd_timeout remains the upper bound")
+    parser.add_argument("--resume", action="store_true", help="resume an interrupted run: skip the nodes whose commands were already executed, according to the checkpoint journal. nodes whose command file was edited are run again")
+    parser.add_argument("--journal", default=ck.DEFAULT_JOURNAL, help="checkpoint journal file, in which each node is recorded once its commands are executed. default is checkpoint.jsonl")
+    parser.add_argument("-z", "--compress", choices=list(il.SUFFIXES), help="write the output files compressed with gzip or zstd (which requires the zstandard package), along with an index of the output of each command. default is no compression")
+    parser.add_argument("--trace", help="write a JSONL trace of the time taken by each jump, command, delay and file manipulation to TRACE")
+    parser.add_argument("--profile", action="store_true", help="print a summary of the time taken by the run, listing the slowest nodes and commands")
     parser.add_argument("-c", "--config", nargs="+", help="one or more local configuration files. default is config.txt")
     parser.set_defaults(filemanip=fm.deflate_file)
     args = parser.parse_args()
+    if args.compress == "zstd" and il.zstandard == None:
+        sys.exit("zstd compression requires the zstandard package (python -m pip install zstandard)")
+    if args.jobs == None:
+        args.jobs = None if args.asyncio else 1
+    tracer = None
+    if (args.trace or args.profile) and not args.dry_run:
+        tracer = pf.Tracer(args.trace)
     cgol = []
     if args.config:
         if len(args.config) > 1:
@@ -37,20 +61,46 @@ ARISING OUT OF OR IN CONNECTION WITH THE USE OF THIS SCRIPT.""")
         else:
             print(f"\nusing configuration file {args.config}")
         for c in args.config:
-            cgol.append(pcr.ConfigGrabber(c))
+            cgol.append(pcr.ConfigGrabber(c, tracer=tracer))
     else:
-        cgol.append(pcr.ConfigGrabber())
+        cgol.append(pcr.ConfigGrabber(tracer=tracer))
 
     if not args.dry_run:
+        pool = cp.ConnectionPool(idle_timeout=args.idle_timeout, tunnel=args.tunnel)
+        log_filter = fm.get_filter(args.filemanip)
+        quiet_cache = qc.QuietCache(args.adaptive) if args.adaptive and args.timeout else None
+        journal = ck.Journal(args.journal, resume=args.resume)
         for cgo in cgol:
             nodes = pcr.get_all_nodes(cgo)
-            fp = pcr.boxjumper(cgo, len(cgo), print_output=args.print_output, blocking= not args.timeout)
+            start = perf_counter()
+            if args.asyncio:
+                fp = acr.run(acr.async_boxjumper(cgo, len(cgo), print_output=args.print_output, blocking= not args.timeout, max_workers=args.jobs, pool=pool, log_filter=log_filter, tracer=tracer, quiet_cache=quiet_cache, journal=journal, compression=args.compress))
+            else:
+                fp = pcr.boxjumper(cgo, len(cgo), print_output=args.print_output, blocking= not args.timeout, max_workers=args.jobs, pool=pool, log_filter=log_filter, tracer=tracer, quiet_cache=quiet_cache, journal=journal, compression=args.compress)
             if fp:
                 fp.close()
-            pcr.move_to_tmp(nodes, args.filemanip)
+            if tracer:
+                tracer.record("boxjumper", None, perf_counter() - start, file=cgo.filename)
+            # the output files were already manipulated as they were written
+            moved = pcr.move_to_tmp(nodes, None if log_filter else args.filemanip, tracer=tracer)
+            journal.relocate(moved)
+        pool.close()
+        journal.close()
+        if quiet_cache:
+            quiet_cache.save()
+        if tracer:
+            tracer.close()
+            if args.profile:
+                print(tracer.summary())
     else:
         print(f"blocking is {not args.timeout}")
         print(f"print output is {args.print_output}")
+        print(f"jobs is {args.jobs}")
+        print(f"asyncio is {args.asyncio}")
+        print(f"tunnel is {args.tunnel}")
+        print(f"adaptive cmd_timeout is {bool(args.adaptive and args.timeout)}")
+        print(f"resume is {args.resume}")
+        print(f"compression is {args.compress}")
         if args.filemanip == fm.deflate_file:
             print("normal output\n")
         elif args.filemanip == fm.flatten_file:
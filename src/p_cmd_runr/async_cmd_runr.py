@@ -0,0 +1,426 @@
+import sys
+import re
+import codecs
+import asyncio
+from time import perf_counter
+import paramiko
+from p_cmd_runr.p_cmd_runr import CmdRunner, create_cmd_runners, prepare_jumpbox, update_stats
+from p_cmd_runr import quiet_cache as qc
+
+
+
+def run(coro):
+    """
+    Description:
+        Runs a coroutine (such as async_boxjumper) to completion in a new event loop.
+    Parameters:
+        - coro coroutine object.
+    Returns:
+        The result of the coroutine.
+    """
+    if hasattr(asyncio, "run"):
+        return asyncio.run(coro)
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+
+async def wait_recv_ready(channel, timeout=None):
+    """
+    Description:
+        Waits until data is ready to be received from channel, or until channel is closed.
+        The channel's file descriptor is watched by the event loop, so no thread is blocked while waiting.
+        Event loops that cannot watch file descriptors (such as the Windows proactor loop) fall back to polling.
+    Parameters:
+        - channel a Paramiko channel.
+        - timeout maximum time (in seconds) to wait. default is to wait indefinitely.
+    Returns:
+        True if data is ready or channel is closed, False if timeout expired.
+    """
+    if channel.recv_ready() or channel.closed:
+        return True
+    loop = asyncio.get_event_loop()
+    ready = asyncio.Event()
+    fd = channel.fileno()
+    try:
+        loop.add_reader(fd, ready.set)
+    except NotImplementedError:
+        fd = None
+
+    async def poll():
+        while not (channel.recv_ready() or channel.closed):
+            await asyncio.sleep(0.05)
+
+    try:
+        await asyncio.wait_for(ready.wait() if fd is not None else poll(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        if fd is not None:
+            loop.remove_reader(fd)
+
+
+
+def recv_available(channel, decoder, stats=None):
+    """
+    Description:
+        Receives, without blocking, all the data that is ready on channel.
+    Parameters:
+        - channel a Paramiko channel.
+        - decoder incremental utf-8 decoder, which keeps multi-byte characters split between reads intact.
+        - stats optional dictionary in which timing information is accumulated (see p_cmd_runr.update_stats).
+    Returns:
+        Received text. An empty string if no data was ready.
+    """
+    rcv = ""
+    while channel.recv_ready():
+        data = channel.recv(10000000)
+        update_stats(stats, data)
+        rcv += decoder.decode(data)
+    return rcv
+
+
+
+def ends_with_prompt(rcv, prompts):
+    """
+    Description:
+        Determines whether the received text ends with one of the prompt characters.
+    """
+    rcv = rcv.strip()
+    return len(rcv) > 0 and rcv[-1] in prompts
+
+
+
+async def async_send_receive_cmd_blocking(channel, cmd, prompts="$#?<>", print_output=False, stats=None):
+    """
+    Description:
+        Asynchronous version of send_receive_cmd_blocking.
+        Output is read as soon as it arrives, and the function returns as soon as one of the prompts is detected.
+    Paramaters:
+        - channel a Paramiko channel.
+        - cmd text to send. cmd could be the special notation ":<number of seconds>:",
+        which introduces a pause of number of seconds. The output of the previous command
+        that was received during the pause is returned.
+        - prompts string of characters representing command line prompts.
+        - print_output determines whether or not to print command output on the screen.
+        - stats optional dictionary filled with timing information for profiling (see recv_available).
+    Returns:
+        Received text as a result of sent cmd.
+    """
+    rcv = ""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    cp = re.compile(r":(\d+)[sS]?:")
+    m = cp.search(cmd)
+    if m:
+        pause = int(m.group(1))
+        await asyncio.sleep(pause)
+        if stats != None:
+            stats["pause"] = pause
+            stats["sent"] = perf_counter()
+        rcv = recv_available(channel, decoder, stats)
+        if print_output and rcv:
+            print(rcv)
+        return rcv
+
+    channel.send(cmd + "\n")
+    if stats != None:
+        stats["sent"] = perf_counter()
+    while True:
+        await wait_recv_ready(channel)
+        output = recv_available(channel, decoder, stats)
+        if not output and channel.closed:
+            break
+        if print_output and output:
+            print(output)
+        rcv += output
+        if ends_with_prompt(rcv, prompts):
+            break
+
+    return rcv
+
+
+
+async def async_send_receive_cmd(channel, cmd, cmd_timeout=0.5, print_output=False, stats=None):
+    """
+    Description:
+        Asynchronous version of send_receive_cmd.
+        The function returns once no output has been received for cmd_timeout seconds.
+    Paramaters:
+        - channel a Paramiko channel.
+        - cmd text to send. cmd could be the special notation ":<number of seconds>:",
+        which introduces a pause of number of seconds.
+        - cmd_timeout maximum time to wait (in seconds) for command to return output.
+        - print_output determines whether or not to print command output on the screen.
+        - stats optional dictionary filled with timing information for profiling (see recv_available).
+    Returns:
+        Received text as a result of sent cmd.
+    """
+    rcv = ""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    cp = re.compile(r":(\d+)[sS]?:")
+    m = cp.search(cmd)
+    if m:
+        pause = int(m.group(1))
+        await asyncio.sleep(pause)
+        if stats != None:
+            stats["pause"] = pause
+    else:
+        channel.send(cmd + "\n")
+    if stats != None:
+        stats["sent"] = perf_counter()
+
+    while await wait_recv_ready(channel, cmd_timeout):
+        output = recv_available(channel, decoder, stats)
+        if not output and channel.closed:
+            break
+        if print_output and output:
+            print(output)
+        rcv += output
+
+    return rcv
+
+
+
+async def open_shell(transport):
+    """
+    Description:
+        Opens a new interactive shell channel on transport, without blocking the event loop.
+    Parameters:
+        - transport a Paramiko transport.
+    Returns:
+        channel
+    """
+    def _open():
+        channel = transport.open_session()
+        channel.get_pty()
+        channel.invoke_shell()
+        return channel
+
+    return await asyncio.get_event_loop().run_in_executor(None, _open)
+
+
+
+class AsyncCmdRunner(CmdRunner):
+    """
+    Description:
+        Asynchronous version of CmdRunner. Its jump, execute and reset_channel methods are coroutines.
+        Command output is read as it arrives, so that a single thread can drive many nodes at the same time.
+    """
+    async def jump(self, channelstack=None):
+        """
+        Description:
+            Jumps to a node by creating a new channel or from the channelstack if specified.
+        Parameters:
+            - channelstack optional channel from the previous node.
+        """
+        if channelstack == None or self.can_tunnel():
+            # the ssh handshake and authentication are done by Paramiko's blocking API
+            await asyncio.get_event_loop().run_in_executor(None, CmdRunner.jump, self, channelstack)
+            return
+
+        start = perf_counter()
+        try:
+            rcv = None
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            port = 22
+            if self.jumpbox.get("port"):
+                port = int(self.jumpbox["port"])
+            if self.jumpbox["jump_cmd"].lower() == "ssh":
+                if self.key_file == None:
+                    channelstack.send(f"ssh -o 'StrictHostKeyChecking no' {self.jumpbox['username']}@{self.node} -p {port}" + "\n")
+                    rcv = ""
+                    while not rcv.endswith("assword: "):
+                        if channelstack.closed:
+                            raise Exception(f"Channel closed while waiting for the password prompt of {self.node}")
+                        await wait_recv_ready(channelstack)
+                        rcv += recv_available(channelstack, decoder)
+                    stats = {}
+                    await async_send_receive_cmd(channelstack, self.jumpbox["password"] + "\n", self.get_cmd_timeout(qc.LOGIN), stats=stats)
+                    self.learn(qc.LOGIN, stats)
+                else:
+                    channelstack.send(f"ssh -i {self.key_file} -o 'StrictHostKeyChecking no' {self.jumpbox['username']}@{self.node} -p {port}" + "\n")
+            elif "mos" in self.jumpbox["jump_cmd"].lower():
+                channelstack.send(f"{self.jumpbox['jump_cmd']} {self.node}" + "\n")
+                await asyncio.sleep(10)
+                await wait_recv_ready(channelstack)
+                rcv = recv_available(channelstack, decoder)
+            else:
+                raise Exception(f"{self.jumpbox['jump_cmd']} not supported")
+
+            self.channel = channelstack
+            self.transport = self.channel.get_transport()  # store this new transport
+            self.trace("jump", start, jump_cmd=self.jumpbox["jump_cmd"], hop=True)
+
+        except (paramiko.SSHException, Exception) as e:
+            print(e)
+            print(f"Failed to connect to {self.node}")
+            if self.ssh:
+                self.ssh.close()
+            self.trace("jump", start, jump_cmd=self.jumpbox["jump_cmd"], hop=True, failed=True)
+
+            sys.exit(f"{self.node} connection failed")
+
+
+    async def execute(self, print_output=False):
+        """
+        Description:
+            Executes the commands sequentially, while waiting delay seconds between commands.
+            In blocking mode, the next command is sent as soon as a prompt is detected.
+        Paramaters:
+            - print_output determines whether or not to print command output on the screen. the default is not to print.
+        """
+        for cmd in self.commands:
+            rcv = None
+            stats = {} if self.tracer != None or self.quiet_cache != None else None
+            start = perf_counter()
+            if self.blocking:
+                rcv = await async_send_receive_cmd_blocking(self.channel, cmd, prompts=self.jumpbox["prompts"], print_output=print_output, stats=stats)
+            else:
+                rcv = await async_send_receive_cmd(self.channel, cmd, self.get_cmd_timeout(cmd), print_output=print_output, stats=stats)
+                self.learn(cmd, stats)
+            if self.tracer != None:
+                self.tracer.command(self.node, cmd, start, perf_counter(), stats)
+            if self.compression:
+                self.log_fp.command(cmd)
+            self.log_fp.write(rcv)
+            start = perf_counter()
+            await asyncio.sleep(self.delay)
+            if self.delay:
+                self.trace("delay", start)
+
+        self.log_fp.close()
+
+
+    async def reset_channel(self):
+        """
+        Description:
+            Reset the channel (which might be the same as channelstack) using the stored transport.
+        """
+        if self.pooled:
+            self.channel.close()
+        self.channel = await open_shell(self.transport)
+
+
+
+async def run_async_cmd_runner(cmd, channelstack=None, print_output=False, semaphore=None, journal=None, config=None):
+    """
+    Description:
+        Jumps to the node of an AsyncCmdRunner object and executes its commands.
+        If channelstack is given, a new channel is opened on its transport.
+    Parameters:
+        - cmd AsyncCmdRunner object.
+        - channelstack optional channel created by the previous node (if there was a previous node).
+        - print_output determines whether or not to print command output on the screen.
+        - semaphore optional asyncio.Semaphore limiting the number of nodes running at the same time.
+        - journal optional checkpoint.Journal object, in which the node is recorded once its commands are executed.
+        - config name of the configuration file of the node, recorded in journal.
+    """
+    if semaphore:
+        async with semaphore:
+            return await run_async_cmd_runner(cmd, channelstack, print_output, journal=journal, config=config)
+    channel = None
+    if channelstack and not cmd.can_tunnel():
+        start = perf_counter()
+        channel = await open_shell(channelstack.get_transport())
+        cmd.trace("open_channel", start)
+        await cmd.jump(channel)
+    else:
+        await cmd.jump(channelstack)
+    await cmd.execute(print_output)
+    cmd.close()
+    if channel:
+        channel.close()
+    if journal != None:
+        journal.record(config, cmd.node, cmd.cmd_file, cmd.log_file)
+
+
+
+async def async_main(jumpboxes, channelstack=None, print_output=False, blocking=True, max_workers=None, pool=None, log_filter=None, tracer=None, quiet_cache=None, journal=None, compression=None):
+    """
+    Description:
+        Asynchronous version of main. Executes commands on all the final nodes concurrently.
+    Parameters:
+        - jumpboxes list containing a nodes list, a cmd_files list, and a jumpbox object.
+        - channelstack optional channel created by the previous node (if there was a previous node).
+        - print_output determines whether or not to print command output on the screen.
+        - blocking determines whether to block and wait for a command to finish executing.
+        - max_workers maximum number of nodes to run commands on at the same time. default is no limit.
+        - pool optional ConnectionPool object from which ssh transports are obtained.
+        - log_filter optional streaming filter class (such as file_manip.Deflater) applied to the log files as they are written.
+        - tracer optional profiler.Tracer object recording the time taken by the jumps and commands.
+        - quiet_cache optional quiet_cache.QuietCache object from which the time to wait for output is taken in non-blocking mode.
+        - journal optional checkpoint.Journal object. nodes completed by a resumed run are skipped, and the others are recorded as they complete.
+        - compression optional compression (gzip or zstd) of the log files. an index of the output of each command is written along with them.
+    """
+    config = getattr(jumpboxes, "filename", None)
+    pl = create_cmd_runners(jumpboxes, blocking, runner=AsyncCmdRunner, pool=pool, log_filter=log_filter, tracer=tracer, quiet_cache=quiet_cache, journal=journal, compression=compression)
+    if pl:
+        semaphore = asyncio.Semaphore(max_workers) if max_workers else None
+        await asyncio.gather(*[run_async_cmd_runner(p, channelstack, print_output, semaphore, journal, config) for p in pl])
+        print("async_main has finished.")
+
+
+
+async def async_boxjumper(jumpboxes, count, fp=None, channelstack=None, print_output=False, blocking=True, max_workers=None, pool=None, log_filter=None, tracer=None, quiet_cache=None, journal=None, compression=None):
+    """
+    Description:
+        Asynchronous version of boxjumper. It recursively logs into the boxes/nodes defined in jumpboxes,
+        and executes the commands of the final nodes concurrently.
+    Parameters:
+        - jumpboxes list of jumpbox objects.
+        - count number of jumpboxes.
+        - fp boxjumper's log file pointer.
+        - channelstack optional channel created by the previous node (if there was a previous node).
+        - print_output determines whether or not to print command output on the screen.
+        - blocking determines whether to block and wait for a command to finish executing.
+        - max_workers maximum number of final nodes to run commands on at the same time. default is no limit.
+        - pool optional ConnectionPool object. its transports are reused across async_boxjumper calls.
+        - log_filter optional streaming filter class (such as file_manip.Deflater) applied to the log files as they are written.
+        - tracer optional profiler.Tracer object recording the time taken by the jumps and commands of all the nodes.
+        - quiet_cache optional quiet_cache.QuietCache object, which learns how long to wait for the output of each command in non-blocking mode.
+        - journal optional checkpoint.Journal object, in which each node is recorded once its commands are executed.
+        - compression optional compression (gzip or zstd) of the log files. an index of the output of each command is written along with them.
+    Returns:
+        fp boxjumper's log file pointer. (the file itself is named boxjumper.log)
+    """
+    if len(jumpboxes):
+        cmdlogf = None
+        cmd = None
+        currentnode = None
+        config = getattr(jumpboxes, "filename", None)
+        if jumpboxes[0].get("node"):
+            if fp == None:
+                fp = open("boxjumper.log", mode="w", encoding="utf-8")
+            cmdlogf = prepare_jumpbox(jumpboxes[0])
+            currentnode = jumpboxes[0]["node"]
+            cmd_file = jumpboxes[0].get("cmd_file")
+            if cmdlogf and journal != None and journal.done(config, currentnode, cmd_file):
+                print(f"Skipping commands on {currentnode}: {cmd_file} was already executed")
+                cmd_file = cmdlogf = None
+            fp.write(f"Accessing {currentnode}\n")
+            cmd = AsyncCmdRunner(jumpboxes[0], node=currentnode, cmd_file=cmd_file, key_file=jumpboxes[0].get("key_file"), log_file=cmdlogf, blocking=blocking, pool=pool, log_filter=log_filter, tracer=tracer, quiet_cache=quiet_cache, compression=compression)
+            await cmd.jump(channelstack)
+
+            jumpboxes.pop()
+
+            fp = await async_boxjumper(jumpboxes, len(jumpboxes), fp=fp, channelstack=cmd.get_channel(), print_output=print_output, blocking=blocking, max_workers=max_workers, pool=pool, log_filter=log_filter, tracer=tracer, quiet_cache=quiet_cache, journal=journal, compression=compression)
+        else:
+            await async_main(jumpboxes, channelstack, print_output=print_output, blocking=blocking, max_workers=max_workers, pool=pool, log_filter=log_filter, tracer=tracer, quiet_cache=quiet_cache, journal=journal, compression=compression)
+
+        if cmdlogf:
+            fp.write(f"Executing commands on {currentnode}\n")
+            if count > 1:
+                start = perf_counter()
+                await cmd.reset_channel()
+                cmd.trace("open_channel", start)
+            await cmd.execute(print_output)
+            if journal != None:
+                journal.record(config, currentnode, cmd.cmd_file, cmd.log_file)
+
+        if cmd:
+            cmd.close()
+
+        if currentnode:
+            fp.write(f"Leaving {currentnode}\n")
+
+    return fp
@@ -0,0 +1,158 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from time import strftime, localtime
+
+
+
+DEFAULT_JOURNAL = "checkpoint.jsonl"
+
+
+
+class Journal:
+    """
+    Description:
+        Append-only checkpoint journal of a run. A line is appended each time the commands of a
+        (configuration file, node, command file) triple have been executed, with the name of its log file.
+        Command files are identified by the hash of their contents, so that edited command files are run again.
+        When resuming a run, the triples found in the journal are skipped.
+        Once the log files are moved (see p_cmd_runr.move_to_tmp), relocate updates their paths in the journal.
+    """
+    def __init__(self, filename=DEFAULT_JOURNAL, resume=False):
+        """
+        Description:
+            Initializer of a Journal object.
+        Parameters:
+            - filename name of the journal file. default is checkpoint.jsonl.
+            - resume determines whether to load the journal of a previous run, and skip its completed triples.
+            Otherwise a new journal is started.
+        Returns:
+            Journal object.
+        """
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.completed = {}
+        self.hashes = {}
+        self.entries = []
+        if resume:
+            try:
+                with open(filename, mode="rt", encoding="utf-8") as fp:
+                    for line in fp:
+                        try:
+                            e = json.loads(line)
+                            key = (e["config"], e["node"], e["cmd_file"], e["hash"])
+                        except (ValueError, KeyError, TypeError):
+                            continue  # such as a line cut short by an interrupted run
+                        self.entries.append(e)
+                        self.completed[key] = self.completed.get(key, 0) + 1
+            except FileNotFoundError:
+                pass
+        self.fp = open(filename, mode="at" if resume else "wt", encoding="utf-8")
+
+
+    def __repr__(self):
+        return str(self.completed)
+
+
+    def hash_file(self, cmd_file):
+        """
+        Description:
+            Returns the sha256 hash of the contents of cmd_file, or None if it cannot be read.
+        """
+        with self.lock:
+            if cmd_file in self.hashes:
+                return self.hashes[cmd_file]
+        try:
+            with open(cmd_file, mode="rb") as fp:
+                digest = hashlib.sha256(fp.read()).hexdigest()
+        except (OSError, TypeError):
+            digest = None
+        with self.lock:
+            self.hashes[cmd_file] = digest
+        return digest
+
+
+    def make_key(self, config, node, cmd_file):
+        return (os.path.abspath(config) if config else None, node, cmd_file, self.hash_file(cmd_file))
+
+
+    def done(self, config, node, cmd_file):
+        """
+        Description:
+            Determines whether the commands of cmd_file were already executed on node for config by the resumed run.
+            Each completed triple of the journal is only matched once, so that a node listed several times
+            is skipped as many times as it was completed.
+        Parameters:
+            - config name of the configuration file.
+            - node node name.
+            - cmd_file name of the command file.
+        Returns:
+            True if the triple is to be skipped, False otherwise.
+        """
+        key = self.make_key(config, node, cmd_file)
+        with self.lock:
+            if self.completed.get(key, 0) > 0:
+                self.completed[key] -= 1
+                return True
+        return False
+
+
+    def record(self, config, node, cmd_file, log_file):
+        """
+        Description:
+            Appends a completed triple and the path of its log file to the journal.
+        """
+        config, node, cmd_file, digest = self.make_key(config, node, cmd_file)
+        entry = {"time": strftime("%d-%m-%Y %H:%M:%S", localtime()), "config": config, "node": node, "cmd_file": cmd_file,
+                 "hash": digest, "log_file": os.path.abspath(log_file) if log_file else None}
+        with self.lock:
+            self.entries.append(entry)
+            self.fp.write(json.dumps(entry) + "\n")
+            self.fp.flush()
+            os.fsync(self.fp.fileno())
+
+
+    def relocate(self, moved):
+        """
+        Description:
+            Updates the paths of the log files that were moved, and rewrites the journal if any entry changed.
+            The journal file is replaced atomically.
+        Parameters:
+            - moved dictionary mapping the old path of each moved log file to its new path, as returned by p_cmd_runr.move_to_tmp.
+        """
+        moved = {os.path.abspath(old): os.path.abspath(new) for old, new in moved.items()}
+        with self.lock:
+            changed = False
+            for entry in self.entries:
+                if entry.get("log_file") in moved:
+                    entry["log_file"] = moved[entry["log_file"]]
+                    changed = True
+            if not changed:
+                return
+            fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.filename)), suffix=".tmp")
+            try:
+                with os.fdopen(fd, mode="wt", encoding="utf-8") as fp:
+                    for entry in self.entries:
+                        fp.write(json.dumps(entry) + "\n")
+                    fp.flush()
+                    os.fsync(fp.fileno())
+                self.fp.close()
+                os.replace(tmpname, self.filename)
+            except:
+                if os.path.exists(tmpname):
+                    os.remove(tmpname)
+                raise
+            finally:
+                if self.fp.closed:
+                    self.fp = open(self.filename, mode="at", encoding="utf-8")
+
+
+    def close(self):
+        """
+        Description:
+            Closes the journal file.
+        """
+        with self.lock:
+            self.fp.close()
@@ -0,0 +1,188 @@
+import hashlib
+import threading
+from time import time
+import paramiko
+
+
+
+class ConnectionPool:
+    """
+    Description:
+        Keeps authenticated SSH transports open, so that later CmdRunner objects and boxjumper calls
+        can open new channels on them instead of logging in again.
+        Transports are keyed by (node, port, username, auth) and by the transport they were tunnelled through, if any.
+        A transport that is no longer used is closed once it has been idle for idle_timeout seconds.
+        Idle transports are closed by a background reaper thread, which checks the pool every reap_interval seconds,
+        so the timeout is best-effort: a transport may stay open up to reap_interval seconds longer.
+    """
+    def __init__(self, idle_timeout=300, tunnel=False, reap_interval=None):
+        """
+        Description:
+            Initializer of a ConnectionPool object.
+        Parameters:
+            - idle_timeout time (in seconds) after which an unused transport is closed. default is 300 sec.
+            - tunnel determines whether to reach the next ssh hop through a direct-tcpip channel
+            opened on the previous node's transport, instead of running ssh in the previous node's shell.
+            Note that the key files of tunnelled hops are then read on the local machine.
+            - reap_interval time (in seconds) between two checks of the reaper thread. default is idle_timeout / 2, at most 60 sec.
+        Returns:
+            ConnectionPool object.
+        """
+        self.idle_timeout = idle_timeout
+        self.tunnel = tunnel
+        self.lock = threading.Lock()
+        self.key_locks = {}
+        self.entries = {}
+        self.keys = {}
+        if reap_interval == None:
+            reap_interval = min(max(idle_timeout / 2, 0.1), 60)
+        self.reap_interval = reap_interval
+        self.stopped = threading.Event()
+        self.reaper = threading.Thread(target=self.reap, daemon=True)
+        self.reaper.start()
+
+
+    def __len__(self):
+        return len(self.entries)
+
+
+    def __repr__(self):
+        return str(list(self.entries.keys()))
+
+
+    def make_key(self, node, port=22, username=None, password=None, key_file=None, via=None):
+        """
+        Description:
+            Returns the pool key of a transport. Passwords are only kept as a hash in the key.
+        """
+        if key_file:
+            auth = ("key_file", key_file)
+        else:
+            auth = ("password", hashlib.sha256((password or "").encode("utf-8")).hexdigest())
+        upstream = None
+        if via is not None:
+            upstream = self.keys.get(via, ("transport", id(via)))
+        return (node, int(port), username, auth, upstream)
+
+
+    def get_transport(self, node, port=22, username=None, password=None, key_file=None, passphrase=None, via=None):
+        """
+        Description:
+            Returns an authenticated transport to node, reusing a pooled one if it is still active.
+            The transport must be handed back with release once it is no longer used.
+        Parameters:
+            - node hostname or IP address of the node.
+            - port ssh port number. default is 22.
+            - username login username.
+            - password login password. ignored if key_file is provided.
+            - key_file optional SSH security key file.
+            - passphrase optional passphrase of key_file.
+            - via optional transport of the previous node, through which a direct-tcpip tunnel to node is opened.
+        Returns:
+            transport
+        """
+        key = self.make_key(node, port, username, password, key_file, via)
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self.lock:
+                self.evict_idle_locked()
+                entry = self.entries.get(key)
+                if entry and entry["transport"].is_active():
+                    entry["refs"] += 1
+                    entry["last_used"] = time()
+                    return entry["transport"]
+                if entry:
+                    self.close_entry(key)
+
+            sock = None
+            if via is not None:
+                sock = via.open_channel("direct-tcpip", (node, int(port)), ("127.0.0.1", 0))
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            if key_file == None:
+                client.connect(hostname=node, port=int(port), username=username, password=password, sock=sock)
+            else:
+                client.connect(hostname=node, port=int(port), username=username, key_filename=key_file, passphrase=passphrase, sock=sock)
+            transport = client.get_transport()
+
+            with self.lock:
+                parent = key[4] if key[4] in self.entries else None
+                if parent:
+                    self.entries[parent]["refs"] += 1
+                self.entries[key] = {"client": client, "transport": transport, "refs": 1, "last_used": time(), "parent": parent}
+                self.keys[transport] = key
+            return transport
+
+
+    def release(self, transport):
+        """
+        Description:
+            Hands a transport obtained from get_transport back to the pool.
+        Parameters:
+            - transport a Paramiko transport.
+        """
+        with self.lock:
+            key = self.keys.get(transport)
+            if key == None:
+                return
+            entry = self.entries[key]
+            entry["refs"] -= 1
+            entry["last_used"] = time()
+            self.evict_idle_locked()
+
+
+    def evict_idle(self):
+        """
+        Description:
+            Closes the unused transports that have been idle for idle_timeout seconds, or that are no longer active.
+        """
+        with self.lock:
+            self.evict_idle_locked()
+
+
+    def reap(self):
+        """
+        Description:
+            Body of the reaper thread: evicts the idle transports every reap_interval seconds, until the pool is closed.
+        """
+        while not self.stopped.wait(self.reap_interval):
+            self.evict_idle()
+
+
+    def evict_idle_locked(self):
+        now = time()
+        for key, entry in list(self.entries.items()):
+            if key not in self.entries or entry["refs"] > 0:
+                continue
+            if (now - entry["last_used"] >= self.idle_timeout) or not entry["transport"].is_active():
+                self.close_entry(key)
+
+
+    def close_entry(self, key):
+        entry = self.entries.pop(key)
+        self.keys.pop(entry["transport"], None)
+        entry["client"].close()
+        parent = self.entries.get(entry["parent"])
+        if parent:
+            parent["refs"] -= 1
+            parent["last_used"] = time()
+
+
+    def close(self):
+        """
+        Description:
+            Closes all the pooled transports, tunnelled ones first, and stops the reaper thread.
+        """
+        self.stopped.set()
+        with self.lock:
+            for key in sorted(self.entries, key=self.depth, reverse=True):
+                self.close_entry(key)
+
+
+    def depth(self, key):
+        d = 0
+        while key[4] in self.entries:
+            key = key[4]
+            d += 1
+        return d
@@ -1,7 +1,11 @@
 
 import sys
-import functools
+import io
+import os
+import shutil
+import tempfile
 import math
+from p_cmd_runr import indexed_log as il
 
 
 
@@ -19,6 +23,20 @@ def flatten(lines):
 
  
 
+class Flattener:
+    """
+    Description:
+        Streaming version of flatten. Lines are fed one at a time, and the text that can be written is returned.
+    """
+    def feed(self, line):
+        return line if line.strip() else ""
+
+
+    def flush(self):
+        return ""
+
+
+
 def flatten_file(filename):
     """
     Desription:
@@ -27,16 +45,7 @@ def flatten_file(filename):
     Parameters:
         - filename name of the file.
     """
-    lines = []
-    with open(filename, mode="rt", encoding="utf-8") as fp:
-        try:
-            lines = fp.readlines()
-            lines = flatten(lines)
-        except:
-            pass
-    with open(filename, mode="wt", encoding="utf-8") as fp:
-        for l in lines:
-            fp.write(l)
+    filter_file(filename, Flattener())
 
 
 
@@ -60,6 +69,44 @@ def squeeze(s1, s2=""):
 
 
 
+class Squeezer:
+    """
+    Description:
+        Streaming version of squeeze. Lines are fed one at a time, and the text that can be written is returned.
+        Feeding all the lines of a file gives the same result as functools.reduce(squeeze, lines),
+        while only the trailing whitespace of the result is kept in memory.
+    """
+    def __init__(self):
+        self.started = False
+        self.body = False   # the result so far has non-whitespace characters
+        self.tail = ""      # trailing whitespace of the result so far
+
+
+    def feed(self, line):
+        if not self.started:
+            self.started = True
+            return self.split(line)
+        if not self.body and not self.tail.strip("\n") and not line.strip("\n"):
+            self.tail = "\n\n"
+            return ""
+        if self.tail.endswith("\n\n"):
+            return self.split("\n\n" + line)
+        return self.split("\n" + line)
+
+
+    def split(self, s):
+        body = s.rstrip()
+        self.tail = s[len(body):]
+        if body:
+            self.body = True
+        return body
+
+
+    def flush(self):
+        return self.tail
+
+
+
 def squeeze_file(filename):
     """
     Description:
@@ -68,15 +115,7 @@ def squeeze_file(filename):
     Parameters:
         - filename name of the file.
     """
-    res = ""
-    with open(filename, mode="rt", encoding="utf-8") as fp:
-        try:
-            lines = fp.readlines()
-            res = functools.reduce(squeeze, lines)
-        except:
-            pass
-    with open(filename, mode="wt", encoding="utf-8") as fp:
-        fp.write(res)
+    filter_file(filename, Squeezer())
 
 
 
@@ -85,14 +124,18 @@ def count_from_end(s):
     Definition:
         Counts and returns the number of "\n" charecters at the end of a string.
     """
-    if s.rfind("\n") == -1:
-        return 0
-    i = s.rfind("\n")
-    if i == 0:
-        return 1
-    if i == len(s) - 1:
-        return 1 + count_from_end(s[0:-1])
-    return 0
+    count = 0
+    end = len(s)
+    while True:
+        i = s.rfind("\n", 0, end)
+        if i == -1:
+            return count
+        if i == 0:
+            return count + 1
+        if i != end - 1:
+            return count
+        count += 1
+        end -= 1
 
 
 
@@ -110,6 +153,58 @@ def deflate(s1, s2=""):
 
 
 
+class Deflater:
+    """
+    Description:
+        Streaming version of deflate. Lines are fed one at a time, and the text that can be written is returned.
+        Feeding all the lines of a file gives the same result as functools.reduce(deflate, lines),
+        while only the trailing whitespace of the result is kept in memory.
+    """
+    def __init__(self):
+        self.started = False
+        self.body = False       # the result so far has non-whitespace characters
+        self.nl_first = False   # the non-whitespace part of the result starts with "\n"
+        self.nl_count = 0       # number of "\n" in the non-whitespace part of the result (counting stops at 2)
+        self.tail = ""          # trailing whitespace of the result, without its final "\n" characters
+        self.newlines = 0       # number of final "\n" characters of the result
+
+
+    def feed(self, line):
+        if not self.started:
+            self.started = True
+            return self.split(line)
+        if not line.strip():
+            self.newlines += 1
+            return ""
+        count = math.ceil((self.newlines + self.leading_newline()) / 2)
+        return self.split(count * "\n" + line)
+
+
+    def leading_newline(self):
+        # count_from_end also counts a single "\n" found at the very start of the string
+        if self.body:
+            return 1 if self.nl_first and self.nl_count == 1 and "\n" not in self.tail else 0
+        return 1 if self.tail.startswith("\n") and self.tail.count("\n") == 1 else 0
+
+
+    def split(self, s):
+        body = s.rstrip()
+        tail = s[len(body):]
+        self.tail = tail.rstrip("\n")
+        self.newlines = len(tail) - len(self.tail)
+        if body:
+            if not self.body:
+                self.body = True
+                self.nl_first = body.startswith("\n")
+            self.nl_count = min(2, self.nl_count + body.count("\n"))
+        return body
+
+
+    def flush(self):
+        return self.tail + self.newlines * "\n"
+
+
+
 def deflate_file(filename):
     """
     Description:
@@ -118,15 +213,187 @@ def deflate_file(filename):
     Parameters:
         - filename name of the file.
     """
-    res = ""
-    with open(filename, mode="rt", encoding="utf-8") as fp:
+    filter_file(filename, Deflater())
+
+
+
+def filter_file(filename, filt):
+    """
+    Description:
+        Passes the lines of a text file through a streaming filter (Flattener, Squeezer or Deflater) in a single pass.
+        The result is written to a temporary file, which then replaces the original file.
+        The original file is left untouched if it cannot be decoded.
+        Compressed log files (see indexed_log) are written back with the same compression, and their index is kept up to date.
+    Parameters:
+        - filename name of the file.
+        - filt streaming filter object.
+    """
+    if il.get_compression(filename) or il.read_index(filename):
+        filter_indexed_file(filename, filt)
+        return
+    with open(filename, mode="rt", encoding="utf-8") as ifp:
+        fd, tmpname = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=os.path.dirname(os.path.abspath(filename)))
         try:
-            lines = fp.readlines()
-            res = functools.reduce(deflate, lines)
+            with open(fd, mode="wt", encoding="utf-8") as ofp:
+                for line in ifp:
+                    ofp.write(filt.feed(line))
+                ofp.write(filt.flush())
         except:
-            pass
-    with open(filename, mode="wt", encoding="utf-8") as fp:
-        fp.write(res)
+            os.remove(tmpname)
+            return
+    shutil.copymode(filename, tmpname)
+    os.replace(tmpname, filename)
+
+
+
+def filter_indexed_file(filename, filt):
+    """
+    Description:
+        filter_file for compressed and/or indexed log files. Each block of the index is filtered in turn
+        and written as a new block, so that the output of each command can still be read on its own.
+    """
+    index = il.read_index(filename)
+    fd, tmpname = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=os.path.dirname(os.path.abspath(filename)))
+    os.close(fd)
+    tmpindex = tmpname + il.INDEX_SUFFIX
+    try:
+        writer = FilteredWriter(il.IndexedLogWriter(tmpname, il.get_compression(filename), index_file=tmpindex), filt)
+        if index:
+            for entry in index:
+                writer.command(entry["cmd"])
+                writer.write(il.read_block(filename, entry))
+        else:
+            with il.open_log(filename) as ifp:
+                for line in ifp:
+                    writer.write(line)
+        writer.close()
+    except:
+        for name in (tmpname, tmpindex):
+            if os.path.exists(name):
+                os.remove(name)
+        return
+    shutil.copymode(filename, tmpname)
+    os.replace(tmpname, filename)
+    if index:
+        os.replace(tmpindex, filename + il.INDEX_SUFFIX)
+    else:
+        os.remove(tmpindex)
+
+
+
+class FilteredWriter:
+    """
+    Description:
+        File-like object that passes the text written to it through a streaming filter (Flattener, Squeezer or Deflater)
+        before writing it to fp. Newlines are translated the same way as when reading the file back in text mode,
+        so that the file is the same as if the filter's file function had been applied to it afterwards.
+        When fp is an indexed_log.IndexedLogWriter object, the blocks of the commands start where their output started
+        in the unfiltered text, although the filter only outputs whole lines.
+    """
+    def __init__(self, fp, filt):
+        """
+        Description:
+            Initializer of a FilteredWriter object.
+        Parameters:
+            - fp file object opened in text mode.
+            - filt streaming filter object.
+        Returns:
+            FilteredWriter object.
+        """
+        self.fp = fp
+        self.filt = filt
+        self.decoder = io.IncrementalNewlineDecoder(None, translate=True)
+        self.partial = ""
+        self.skip_lf = False  # a "\r" ending the text of a command was already translated to "\n"
+        self.marks = []       # (offset in the current line, command) of the commands started in the current line
+
+
+    def write(self, text):
+        if self.skip_lf and text:
+            self.skip_lf = False
+            if text.startswith("\n"):
+                text = text[1:]
+        lines = (self.partial + self.decoder.decode(text)).split("\n")
+        self.partial = lines.pop()
+        for line in lines:
+            self.feed(line + "\n")
+        return len(text)
+
+
+    def feed(self, line):
+        """
+        Description:
+            Passes a line through the filter, and writes the result. The result is split where the commands started in the line,
+            the whitespace that the filter puts before the line belonging to the previous command.
+        """
+        out = self.filt.feed(line)
+        if self.marks:
+            body = line.rstrip()
+            if out.endswith(line):
+                start = len(out) - len(line)
+            elif body and out.endswith(body):
+                start = len(out) - len(body)
+            else:
+                start = len(out)
+            pos = 0
+            for offset, cmd in self.marks:
+                end = min(start + offset, len(out))
+                self.fp.write(out[pos:end])
+                self.fp.command(cmd)
+                pos = end
+            out = out[pos:]
+            self.marks = []
+        self.fp.write(out)
+
+
+    def command(self, cmd):
+        """
+        Description:
+            Starts the output of cmd, when fp is an indexed_log.IndexedLogWriter object.
+            The block of the previous command ends at the current position of the unfiltered text.
+        """
+        if self.decoder.getstate()[1] & 1:
+            # the text ends with "\r", which ends the current line whether or not a "\n" follows
+            self.decoder.reset()
+            self.skip_lf = True
+            self.feed(self.partial + "\n")
+            self.partial = ""
+        self.marks.append((len(self.partial), cmd))
+
+
+    def flush(self):
+        self.fp.flush()
+
+
+    def close(self):
+        self.partial += self.decoder.decode("", final=True)
+        if self.partial:
+            self.feed(self.partial)
+            self.partial = ""
+        for offset, cmd in self.marks:
+            self.fp.command(cmd)
+        self.marks = []
+        self.fp.write(self.filt.flush())
+        self.fp.close()
+
+
+
+def get_filter(func):
+    """
+    Description:
+        Returns the streaming filter class that is equivalent to a file manipulation function.
+    Parameters:
+        - func flatten_file, squeeze_file or deflate_file.
+    Returns:
+        Flattener, Squeezer or Deflater. None if func has no streaming equivalent.
+    """
+    if func == flatten_file:
+        return Flattener
+    if func == squeeze_file:
+        return Squeezer
+    if func == deflate_file:
+        return Deflater
+    return None
 
 
 
@@ -0,0 +1,217 @@
+import io
+import os
+import json
+import zlib
+import gzip
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+INDEX_SUFFIX = ".idx"
+GZIP_LEVEL = 6
+
+
+
+def get_compression(filename):
+    """
+    Description:
+        Returns the compression of a log file according to its name (gzip for .gz, zstd for .zst), or None.
+    """
+    for compression, suffix in SUFFIXES.items():
+        if filename.lower().endswith(suffix):
+            return compression
+    return None
+
+
+
+def base_name(filename):
+    """
+    Description:
+        Returns filename without its compression suffix.
+    """
+    compression = get_compression(filename)
+    if compression:
+        return filename[:-len(SUFFIXES[compression])]
+    return filename
+
+
+
+def require_zstd():
+    """
+    Description:
+        Raises ImportError if the zstandard package is not installed.
+    """
+    if zstandard == None:
+        raise ImportError("zstd compression requires the zstandard package (python -m pip install zstandard)")
+
+
+
+class IndexedLogWriter:
+    """
+    Description:
+        File-like object writing a log file compressed with gzip or zstd (or not compressed), along with a sidecar index.
+        The output of each command is written as a separate gzip member or zstd frame, so that the file can be read
+        as a whole by the usual tools, while read_command can decompress the output of a single command.
+        The index (the log file name followed by .idx) has a JSON line per command, with its compressed offset and length
+        in the log file, and its uncompressed offset and size.
+    """
+    def __init__(self, filename, compression="gzip", index_file=None):
+        """
+        Description:
+            Initializer of an IndexedLogWriter object.
+        Parameters:
+            - filename name of the log file.
+            - compression gzip, zstd or None. zstd requires the zstandard package.
+            - index_file optional name of the index file. default is filename followed by .idx.
+        Returns:
+            IndexedLogWriter object.
+        """
+        if compression == "zstd":
+            require_zstd()
+        elif compression not in (None, "gzip"):
+            raise ValueError(f"Unsupported compression {compression}")
+        self.filename = filename
+        self.compression = compression
+        self.fp = open(filename, mode="wb")
+        self.index_fp = open(index_file or filename + INDEX_SUFFIX, mode="wt", encoding="utf-8")
+        self.compressor = None
+        self.n = 0
+        self.cmd = None
+        self.offset = 0
+        self.uoffset = 0
+        self.size = 0
+
+
+    def new_compressor(self):
+        if self.compression == "gzip":
+            return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor().compressobj()
+        return None
+
+
+    def write(self, text):
+        data = text
+        if os.linesep != "\n":
+            data = data.replace("\n", os.linesep)  # same as a log file opened in text mode
+        data = data.encode("utf-8")
+        if data:
+            self.size += len(data)
+            if self.compression:
+                if self.compressor == None:
+                    self.compressor = self.new_compressor()
+                data = self.compressor.compress(data)
+            self.fp.write(data)
+        return len(text)
+
+
+    def command(self, cmd):
+        """
+        Description:
+            Ends the output of the previous command, and starts the output of cmd.
+        """
+        self.end_block()
+        self.cmd = cmd
+
+
+    def end_block(self):
+        if self.compressor != None:
+            self.fp.write(self.compressor.flush())
+            self.compressor = None
+        length = self.fp.tell() - self.offset
+        if self.size or self.cmd != None:
+            entry = {"n": self.n, "cmd": self.cmd, "offset": self.offset, "length": length, "uoffset": self.uoffset, "size": self.size}
+            self.index_fp.write(json.dumps(entry) + "\n")
+            self.n += 1
+        self.offset += length
+        self.uoffset += self.size
+        self.size = 0
+        self.cmd = None
+
+
+    def flush(self):
+        self.fp.flush()
+        self.index_fp.flush()
+
+
+    def close(self):
+        self.end_block()
+        self.fp.close()
+        self.index_fp.close()
+
+
+
+def open_log(filename, mode="rt", encoding="utf-8"):
+    """
+    Description:
+        Opens a log file for reading, whether it is compressed (according to its name) or not.
+    Parameters:
+        - filename name of the log file.
+        - mode rt (text, with universal newlines) or rb.
+        - encoding encoding of the text.
+    Returns:
+        A file object.
+    """
+    compression = get_compression(filename)
+    text = "t" in mode
+    if compression == "gzip":
+        return gzip.open(filename, mode="rt" if text else "rb", encoding=encoding if text else None)
+    if compression == "zstd":
+        require_zstd()
+        raw = zstandard.ZstdDecompressor().stream_reader(open(filename, mode="rb"), read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(raw, encoding=encoding) if text else raw
+    return open(filename, mode="rt" if text else "rb", encoding=encoding if text else None)
+
+
+
+def read_index(log_file):
+    """
+    Description:
+        Returns the entries of the index of log_file, or an empty list if it has no index.
+    """
+    try:
+        with open(log_file + INDEX_SUFFIX, mode="rt", encoding="utf-8") as fp:
+            return [json.loads(line) for line in fp if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+
+def read_block(log_file, entry):
+    """
+    Description:
+        Reads and decompresses the block of log_file described by an index entry.
+    Returns:
+        The text of the block, as it was written.
+    """
+    with open(log_file, mode="rb") as fp:
+        fp.seek(entry["offset"])
+        data = fp.read(entry["length"])
+    compression = get_compression(log_file)
+    if compression == "gzip" and data:
+        data = zlib.decompress(data, 31)
+    elif compression == "zstd" and data:
+        require_zstd()
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data.decode("utf-8")
+
+
+
+def read_command(log_file, cmd):
+    """
+    Description:
+        Returns the output of a command from an indexed log file. Only that command's output is read and decompressed.
+    Parameters:
+        - log_file name of the log file.
+        - cmd the command (its first occurrence is returned), or the number (from 0) of its block in the index.
+    Returns:
+        The output of the command, with universal newlines. None if the command is not in the index.
+    """
+    for entry in read_index(log_file):
+        if entry["cmd"] == cmd or (isinstance(cmd, int) and entry["n"] == cmd):
+            return io.IncrementalNewlineDecoder(None, translate=True).decode(read_block(log_file, entry), final=True)
+    return None
@@ -0,0 +1,158 @@
+import json
+import threading
+from time import time
+
+
+
+class Tracer:
+    """
+    Description:
+        Records the timing of a run: configuration parsing, ssh jumps, commands, delays and output file manipulations.
+        Each record is appended to an optional JSONL trace file as soon as it is made, and kept for summary.
+        A Tracer object can be shared by several threads.
+    """
+    def __init__(self, filename=None):
+        """
+        Description:
+            Initializer of a Tracer object.
+        Parameters:
+            - filename optional name of the JSONL trace file. default is to only keep the records in memory.
+        Returns:
+            Tracer object.
+        """
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.records = []
+        self.fp = None
+        if filename:
+            self.fp = open(filename, mode="wt", encoding="utf-8")
+
+
+    def record(self, event, node=None, wall=0.0, **fields):
+        """
+        Description:
+            Records an event.
+        Parameters:
+            - event name of the event (such as jump, command or delay).
+            - node optional node the event relates to.
+            - wall wall-clock time (in seconds) taken by the event.
+            - fields optional additional fields of the record.
+        """
+        rec = {"time": round(time(), 6), "event": event, "node": node, "wall": round(wall, 6)}
+        rec.update(fields)
+        with self.lock:
+            self.records.append(rec)
+            if self.fp:
+                self.fp.write(json.dumps(rec) + "\n")
+                self.fp.flush()
+
+
+    def command(self, node, cmd, start, end, stats):
+        """
+        Description:
+            Records the execution of a command.
+        Parameters:
+            - node node on which the command was executed.
+            - cmd the command.
+            - start, end perf_counter values taken before sending the command and after its output was received.
+            - stats dictionary filled by send_receive_cmd (or its variants) with the number of bytes received,
+            the times the command was sent, and the first and last output were received, the longest quiet interval of the output,
+            and the pause of a ":<n>s:" command.
+        """
+        first = stats.get("first")
+        last = stats.get("last")
+        sent = stats.get("sent", start)
+        self.record("command", node, end - start, cmd=cmd, bytes=stats.get("bytes", 0),
+                    first_byte=None if first == None else round(first - sent, 6),
+                    prompt_latency=None if last == None else round(end - last, 6),
+                    max_gap=None if stats.get("gap") == None else round(stats["gap"], 6),
+                    pause=stats.get("pause"))
+
+
+    def close(self):
+        """
+        Description:
+            Closes the trace file.
+        """
+        with self.lock:
+            if self.fp:
+                self.fp.close()
+                self.fp = None
+
+
+    def summary(self, top=10):
+        """
+        Description:
+            Returns the summary of the records made so far. See summarize.
+        """
+        with self.lock:
+            records = self.records[:]
+        return summarize(records, top)
+
+
+
+def load_trace(filename):
+    """
+    Description:
+        Reads the records of a JSONL trace file.
+    Parameters:
+        - filename name of the trace file.
+    Returns:
+        A list of records (dictionaries).
+    """
+    with open(filename, mode="rt", encoding="utf-8") as fp:
+        return [json.loads(line) for line in fp if line.strip()]
+
+
+
+def summarize(records, top=10):
+    """
+    Description:
+        Summarizes trace records: total time per event, then the slowest nodes and the slowest commands.
+        The prompt latency of a command is the time between its last received output and the moment it was considered finished.
+        In blocking mode it is the prompt detection delay, and in non-blocking mode it is mostly cmd_timeout.
+    Parameters:
+        - records list of trace records.
+        - top number of nodes and commands listed. default is 10.
+    Returns:
+        The summary as text.
+    """
+    events = {}
+    nodes = {}
+    commands = []
+    for r in records:
+        count, total = events.get(r["event"], (0, 0.0))
+        events[r["event"]] = (count + 1, total + r["wall"])
+        if r["event"] not in ("jump", "open_channel", "command", "delay"):
+            continue
+        n = nodes.setdefault(r["node"], {"jump": 0.0, "commands": 0.0, "delay": 0.0, "bytes": 0, "latencies": [], "total": 0.0})
+        n["total"] += r["wall"]
+        if r["event"] == "command":
+            n["commands"] += r["wall"]
+            n["bytes"] += r.get("bytes", 0)
+            if r.get("prompt_latency") != None:
+                n["latencies"].append(r["prompt_latency"])
+            commands.append(r)
+        elif r["event"] == "delay":
+            n["delay"] += r["wall"]
+        else:
+            n["jump"] += r["wall"]
+
+    lines = ["Time by event:", f"  {'event':<14}{'count':>8}{'total (s)':>12}{'mean (s)':>12}"]
+    for event, (count, total) in sorted(events.items(), key=lambda e: -e[1][1]):
+        lines.append(f"  {event:<14}{count:>8}{total:>12.3f}{total / count:>12.3f}")
+
+    lines += ["", f"Slowest nodes (top {top}):",
+              f"  {'node':<24}{'total (s)':>11}{'jump (s)':>10}{'cmds (s)':>10}{'delay (s)':>11}{'bytes':>10}{'prompt latency mean/max (s)':>30}"]
+    for node, n in sorted(nodes.items(), key=lambda e: -e[1]["total"])[:top]:
+        lat = n["latencies"]
+        latency = f"{sum(lat) / len(lat):.3f}/{max(lat):.3f}" if lat else "-"
+        lines.append(f"  {str(node):<24}{n['total']:>11.3f}{n['jump']:>10.3f}{n['commands']:>10.3f}{n['delay']:>11.3f}{n['bytes']:>10}{latency:>30}")
+
+    lines += ["", f"Slowest commands (top {top}):",
+              f"  {'node':<24}{'command':<30}{'wall (s)':>10}{'bytes':>10}{'first byte (s)':>16}{'prompt latency (s)':>20}"]
+    for r in sorted(commands, key=lambda r: -r["wall"])[:top]:
+        first = "-" if r.get("first_byte") == None else f"{r['first_byte']:.3f}"
+        latency = "-" if r.get("prompt_latency") == None else f"{r['prompt_latency']:.3f}"
+        lines.append(f"  {str(r['node']):<24}{r['cmd'][:29]:<30}{r['wall']:>10.3f}{r.get('bytes', 0):>10}{first:>16}{latency:>20}")
+    return "\n".join(lines)
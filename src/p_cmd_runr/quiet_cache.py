@@ -0,0 +1,100 @@
+import os
+import json
+import tempfile
+import threading
+
+
+
+DEFAULT_CACHE = "quiet_cache.json"
+# key of the wait that follows the password, when jumping to a node with ssh from the previous node's shell
+LOGIN = ":login:"
+
+
+
+class QuietCache:
+    """
+    Description:
+        Learns, for each node and command, the longest time the command's output was quiet: the time to its first output,
+        or between two pieces of its output. In non-blocking mode, a command can then be considered finished once
+        its output has been quiet for margin times that interval, instead of waiting cmd_timeout after every command.
+        The learned intervals are kept in a small JSON cache file, so that they are used by the next runs.
+    """
+    def __init__(self, filename=DEFAULT_CACHE, margin=2.0, min_timeout=0.2):
+        """
+        Description:
+            Initializer of a QuietCache object. The cache file is loaded if it exists.
+        Parameters:
+            - filename name of the JSON cache file. default is quiet_cache.json.
+            - margin factor applied to the learned interval. default is 2.
+            - min_timeout minimum time (in seconds) to wait for output. default is 0.2 sec.
+        Returns:
+            QuietCache object.
+        """
+        self.filename = filename
+        self.margin = margin
+        self.min_timeout = min_timeout
+        self.lock = threading.Lock()
+        self.changed = False
+        self.gaps = {}
+        try:
+            with open(filename, mode="rt", encoding="utf-8") as fp:
+                self.gaps = json.load(fp)
+        except FileNotFoundError:
+            pass
+        except ValueError:
+            print(f"Ignoring invalid cache file {filename}")
+
+
+    def __repr__(self):
+        return str(self.gaps)
+
+
+    def timeout(self, node, cmd, cmd_timeout):
+        """
+        Description:
+            Returns the time to wait for the output of cmd on node. cmd_timeout is returned
+            for the commands that were not run before, and is the upper bound otherwise.
+        """
+        with self.lock:
+            gap = self.gaps.get(node, {}).get(cmd)
+        if gap == None:
+            return cmd_timeout
+        return min(cmd_timeout, max(self.min_timeout, gap * self.margin))
+
+
+    def update(self, node, cmd, gap):
+        """
+        Description:
+            Learns the longest quiet interval observed while running cmd on node. The longest interval ever observed is kept.
+        Parameters:
+            - node node on which cmd was run.
+            - cmd the command.
+            - gap longest quiet interval (in seconds), as measured by send_receive_cmd in its stats dictionary.
+            None if no output was received, in which case nothing is learned.
+        """
+        if gap == None:
+            return
+        with self.lock:
+            cmds = self.gaps.setdefault(node, {})
+            if gap > cmds.get(cmd, 0):
+                cmds[cmd] = round(gap, 3)
+                self.changed = True
+
+
+    def save(self):
+        """
+        Description:
+            Writes the cache file, if anything was learned. The file is replaced atomically.
+        """
+        with self.lock:
+            if not self.changed:
+                return
+            fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.filename)), suffix=".tmp")
+            try:
+                with os.fdopen(fd, mode="wt", encoding="utf-8") as fp:
+                    json.dump(self.gaps, fp, indent=1, sort_keys=True)
+                os.replace(tmpname, self.filename)
+            except:
+                os.remove(tmpname)
+                raise
+            self.changed = False
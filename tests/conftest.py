@@ -0,0 +1,60 @@
+import pytest
+from fake_ssh_server import FakeSSHServer
+
+
+
+@pytest.fixture
+def fake_server():
+    """
+    Description:
+        Fake ssh/amos server (see benchmarks/fake_ssh_server.py) listening on a free local port.
+    """
+    server = FakeSSHServer(latency=0.2, output_lines=3)
+    server.start()
+    yield server
+    server.stop()
+
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Description:
+        Empty working directory, made the current directory since the log files are written there.
+    """
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+
+def write_config(workdir, port, nodes, commands=("show a", "show b"), cmd_timeout=0.5):
+    """
+    Description:
+        Writes config.txt and cmds.txt: a jumpbox on the fake server, and the given final nodes running commands.
+    """
+    (workdir / "cmds.txt").write_text("".join(f"{c}\n" for c in commands), encoding="utf-8")
+    (workdir / "config.txt").write_text(
+        f"jump_cmd = ssh\nnode = 127.0.0.1\nport = {port}\nusername = u\npassword = p\nend\n\n"
+        f"nodes = {', '.join(nodes)}\ncmd_files = cmds.txt\njump_cmd = ssh\nusername = a\npassword = b\ncmd_timeout = {cmd_timeout}\nend\n", encoding="utf-8")
+    return str(workdir / "config.txt")
+
+
+
+def overlapping(records):
+    """
+    Description:
+        Determines whether the commands of different nodes ran at the same time.
+    """
+    spans = sorted((r["time"] - r["wall"], r["time"], r["node"]) for r in records)
+    return any(a[1] > b[0] and a[2] != b[2] for a, b in zip(spans, spans[1:]))
+
+
+
+def read_log(workdir, node):
+    """
+    Description:
+        Returns the text of the only log file of node in workdir.
+    """
+    logs = list(workdir.glob(f"{node}_*.txt"))
+    assert len(logs) == 1
+    return logs[0].read_text(encoding="utf-8")
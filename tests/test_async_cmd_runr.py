@@ -0,0 +1,112 @@
+import json
+import pytest
+from conftest import write_config, overlapping, read_log
+from fake_ssh_server import FakeSSHServer
+from p_cmd_runr import p_cmd_runr as pcr
+from p_cmd_runr import async_cmd_runr as acr
+from p_cmd_runr import file_manip as fm
+from p_cmd_runr import checkpoint as ck
+from p_cmd_runr import profiler as pf
+
+
+
+@pytest.fixture
+def fast_server():
+    """
+    Description:
+        Fake server answering each command at once.
+    """
+    server = FakeSSHServer(latency=0, output_lines=3)
+    server.start()
+    yield server
+    server.stop()
+
+
+
+def run(workdir, port, nodes=("n1",), commands=("show a", "show b"), asyncio=True, cmd_timeout=0.5, **kwargs):
+    """
+    Description:
+        Runs async_boxjumper (or boxjumper) on a config of the fake server, and returns the records of the commands.
+    """
+    tracer = kwargs.pop("tracer", None) or pf.Tracer()
+    cgo = pcr.ConfigGrabber(write_config(workdir, port, nodes, commands, cmd_timeout))
+    if asyncio:
+        fp = acr.run(acr.async_boxjumper(cgo, len(cgo), tracer=tracer, **kwargs))
+    else:
+        fp = pcr.boxjumper(cgo, len(cgo), tracer=tracer, **kwargs)
+    if fp:
+        fp.close()
+    return [r for r in tracer.records if r["event"] == "command"]
+
+
+
+def test_blocking_returns_at_prompt(fast_server, workdir, monkeypatch):
+    records = run(workdir, fast_server.port, commands=("show a", "show b", "show c"))
+    assert [r["cmd"] for r in records] == ["show a", "show b", "show c"]
+    assert max(r["wall"] for r in records) < 0.15
+    log = read_log(workdir, "n1")
+    for cmd in ("show a", "show b", "show c"):
+        assert f"n1 {cmd} 000002" in log
+
+    (workdir / "threaded").mkdir()
+    monkeypatch.chdir(workdir / "threaded")
+    threaded = run(workdir / "threaded", fast_server.port, commands=("show a", "show b", "show c"), asyncio=False)
+    assert min(r["wall"] for r in threaded) >= 0.2
+
+
+
+def test_non_blocking_waits_cmd_timeout(fake_server, workdir):
+    records = run(workdir, fake_server.port, blocking=False, cmd_timeout=0.6)
+    assert len(records) == 2
+    for r in records:
+        assert 0.6 <= r["wall"] < 1.5
+        assert r["first_byte"] >= 0.2    # the fake server's latency
+    log = read_log(workdir, "n1")
+    assert "n1 show a 000002" in log and "n1 show b 000002" in log
+
+
+
+@pytest.mark.parametrize("blocking", [True, False])
+def test_pause(fake_server, workdir, blocking):
+    records = run(workdir, fake_server.port, commands=("show a", ":1s:", "show b"), blocking=blocking)
+    assert [r["cmd"] for r in records] == ["show a", ":1s:", "show b"]
+    pause = records[1]
+    assert pause["pause"] == 1
+    assert pause["wall"] >= 1
+    assert fake_server.counters["commands"] == 2   # the pause is not sent
+    assert "n1 show b 000002" in read_log(workdir, "n1")
+
+
+
+@pytest.mark.parametrize("max_workers, concurrent", [(1, False), (2, True), (None, True)])
+def test_max_workers(fake_server, workdir, max_workers, concurrent):
+    nodes = ["n1", "n2", "n3"]
+    records = run(workdir, fake_server.port, nodes=nodes, max_workers=max_workers)
+    assert len(records) == 2 * len(nodes)
+    assert overlapping(records) == concurrent
+    for node in nodes:
+        assert f"{node} show b 000002" in read_log(workdir, node)
+
+
+
+def test_hooks_match_boxjumper(fake_server, workdir, monkeypatch):
+    nodes = ["n1", "n2"]
+    results = {}
+    for engine in ("threaded", "asyncio"):
+        d = workdir / engine
+        d.mkdir()
+        monkeypatch.chdir(d)
+        journal = ck.Journal(str(d / "checkpoint.jsonl"))
+        tracer = pf.Tracer()
+        records = run(d, fake_server.port, nodes=nodes, asyncio=engine == "asyncio", max_workers=2,
+                      log_filter=fm.Deflater, tracer=tracer, journal=journal)
+        journal.close()
+        with open(d / "checkpoint.jsonl", mode="rt", encoding="utf-8") as fp:
+            entries = [json.loads(line) for line in fp]
+        results[engine] = {
+            "logs": {node: read_log(d, node) for node in nodes},
+            "commands": sorted((r["node"], r["cmd"], r["bytes"]) for r in records),
+            "journal": sorted((e["node"], e["cmd_file"], e["hash"], d.name in e["log_file"]) for e in entries),
+        }
+    assert results["asyncio"] == results["threaded"]
+    assert len(results["asyncio"]["journal"]) == len(nodes)
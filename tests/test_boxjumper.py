@@ -0,0 +1,43 @@
+from conftest import write_config, overlapping
+from p_cmd_runr import p_cmd_runr as pcr
+from p_cmd_runr import profiler as pf
+
+
+
+NODES = ["n1", "n2", "n3", "n4"]
+
+
+
+def run(workdir, port, max_workers):
+    tracer = pf.Tracer()
+    cgo = pcr.ConfigGrabber(write_config(workdir, port, NODES))
+    fp = pcr.boxjumper(cgo, len(cgo), max_workers=max_workers, tracer=tracer)
+    if fp:
+        fp.close()
+    return [r for r in tracer.records if r["event"] == "command"]
+
+
+
+def check_logs(workdir):
+    for node in NODES:
+        logs = list(workdir.glob(f"{node}_*.txt"))
+        assert len(logs) == 1
+        text = logs[0].read_text(encoding="utf-8")
+        for cmd in ("show a", "show b"):
+            assert f"{node} {cmd} 000002" in text
+
+
+
+def test_concurrent_nodes(fake_server, workdir):
+    records = run(workdir, fake_server.port, max_workers=4)
+    assert len(records) == 2 * len(NODES)
+    assert overlapping(records)
+    check_logs(workdir)
+
+
+
+def test_sequential_nodes(fake_server, workdir):
+    records = run(workdir, fake_server.port, max_workers=1)
+    assert len(records) == 2 * len(NODES)
+    assert not overlapping(records)
+    check_logs(workdir)
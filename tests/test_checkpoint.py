@@ -0,0 +1,95 @@
+import os
+import json
+from conftest import write_config
+from p_cmd_runr import checkpoint as ck
+from p_cmd_runr import p_cmd_runr as pcr
+
+
+
+def read_journal(path):
+    with open(path, mode="rt", encoding="utf-8") as fp:
+        return [json.loads(line) for line in fp]
+
+
+
+def test_resume_skips_completed_triples(workdir):
+    (workdir / "cmds.txt").write_text("show a\n", encoding="utf-8")
+    journal = ck.Journal()
+    journal.record("config.txt", "n1", "cmds.txt", "n1.txt")
+    journal.record("config.txt", "n1", "cmds.txt", "n1.txt")
+    journal.close()
+    with open(ck.DEFAULT_JOURNAL, mode="at", encoding="utf-8") as fp:
+        fp.write('{"config": "cut short')   # line of an interrupted run
+
+    journal = ck.Journal(resume=True)
+    assert not journal.done("config.txt", "n2", "cmds.txt")
+    assert not journal.done("other.txt", "n1", "cmds.txt")
+    assert journal.done("config.txt", "n1", "cmds.txt")
+    assert journal.done("config.txt", "n1", "cmds.txt")
+    assert not journal.done("config.txt", "n1", "cmds.txt")
+    journal.close()
+    assert not ck.Journal(resume=False).done("config.txt", "n1", "cmds.txt")
+
+
+
+def test_edited_cmd_file_is_run_again(workdir):
+    (workdir / "cmds.txt").write_text("show a\n", encoding="utf-8")
+    journal = ck.Journal()
+    journal.record("config.txt", "n1", "cmds.txt", "n1.txt")
+    journal.close()
+    (workdir / "cmds.txt").write_text("show b\n", encoding="utf-8")
+    journal = ck.Journal(resume=True)
+    assert not journal.done("config.txt", "n1", "cmds.txt")
+    journal.close()
+
+
+
+def test_relocate_after_move_to_tmp(workdir):
+    (workdir / "tmp").mkdir()
+    (workdir / "cmds.txt").write_text("show a\n", encoding="utf-8")
+    log = "n1_18-10-2026_120000.txt"
+    (workdir / log).write_text("output\n", encoding="utf-8")
+    journal = ck.Journal()
+    journal.record("config.txt", "n1", "cmds.txt", log)
+    journal.record("config.txt", "n2", "cmds.txt", None)
+    moved = pcr.move_to_tmp(["n1", "n2"])
+    assert moved == {log: os.path.join("tmp", log)}
+    journal.relocate(moved)
+    journal.record("config.txt", "n3", "cmds.txt", None)
+    journal.close()
+
+    entries = read_journal(ck.DEFAULT_JOURNAL)
+    assert [e["node"] for e in entries] == ["n1", "n2", "n3"]
+    assert entries[0]["log_file"] == str(workdir / "tmp" / log)
+    assert os.path.exists(entries[0]["log_file"])
+    journal = ck.Journal(resume=True)
+    assert journal.done("config.txt", "n1", "cmds.txt")
+    journal.close()
+    assert [p.name for p in workdir.iterdir() if p.name.endswith(".tmp")] == []
+
+
+
+def run(workdir, port, journal):
+    cgo = pcr.ConfigGrabber(write_config(workdir, port, ["n1", "n2"]))
+    nodes = pcr.get_all_nodes(cgo)  # before boxjumper, which consumes cgo
+    fp = pcr.boxjumper(cgo, len(cgo), journal=journal)
+    if fp:
+        fp.close()
+    journal.relocate(pcr.move_to_tmp(nodes))
+    journal.close()
+
+
+
+def test_resume_after_move(fake_server, workdir):
+    (workdir / "tmp").mkdir()
+    run(workdir, fake_server.port, ck.Journal())
+    commands = fake_server.counters["commands"]
+    assert commands == 4
+    run(workdir, fake_server.port, ck.Journal(resume=True))
+    assert fake_server.counters["commands"] == commands
+
+    entries = read_journal(workdir / ck.DEFAULT_JOURNAL)
+    assert sorted(e["node"] for e in entries) == ["n1", "n2"]
+    for e in entries:
+        assert os.path.dirname(e["log_file"]) == str(workdir / "tmp")
+        assert "show b 000002" in open(e["log_file"], mode="rt", encoding="utf-8").read()
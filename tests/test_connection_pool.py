@@ -0,0 +1,96 @@
+import pytest
+from time import sleep
+from conftest import write_config, read_log
+from p_cmd_runr import connection_pool as cp
+from p_cmd_runr import p_cmd_runr as pcr
+
+
+
+def test_reuse(fake_server):
+    pool = cp.ConnectionPool()
+    try:
+        t1 = pool.get_transport("127.0.0.1", fake_server.port, "u", "p")
+        pool.release(t1)
+        t2 = pool.get_transport("127.0.0.1", fake_server.port, "u", "p")
+        assert t1 is t2
+        assert fake_server.counters["logins"] == 1
+        pool.release(t2)
+    finally:
+        pool.close()
+    assert len(pool) == 0
+    assert not t1.is_active()
+
+
+
+def test_idle_transport_reaped_without_pool_traffic(fake_server):
+    pool = cp.ConnectionPool(idle_timeout=0.3, reap_interval=0.1)
+    try:
+        transport = pool.get_transport("127.0.0.1", fake_server.port, "u", "p")
+        pool.release(transport)
+        for _ in range(50):
+            if len(pool) == 0:
+                break
+            sleep(0.1)
+        assert len(pool) == 0
+        assert not transport.is_active()
+    finally:
+        pool.close()
+    pool.reaper.join(1)
+    assert not pool.reaper.is_alive()
+
+
+
+def test_used_transport_not_reaped(fake_server):
+    pool = cp.ConnectionPool(idle_timeout=0.1, reap_interval=0.05)
+    try:
+        transport = pool.get_transport("127.0.0.1", fake_server.port, "u", "p")
+        sleep(0.5)
+        assert len(pool) == 1
+        assert transport.is_active()
+        pool.release(transport)
+    finally:
+        pool.close()
+
+
+
+def run_configs(workdir, port, pool):
+    """
+    Description:
+        Runs two configuration files that share the same jumpbox, as gp_cmd_runr does with several -c files.
+    """
+    cgos = [pcr.ConfigGrabber(write_config(workdir, port, nodes)) for nodes in (["n1", "n2"], ["n3"])]
+    for cgo in cgos:
+        fp = pcr.boxjumper(cgo, len(cgo), max_workers=2, pool=pool)
+        if fp:
+            fp.close()
+
+
+
+@pytest.mark.parametrize("pooled, logins", [(True, 1), (False, 2)])
+def test_configs_share_jumpbox_login(fake_server, workdir, pooled, logins):
+    pool = cp.ConnectionPool() if pooled else None
+    try:
+        run_configs(workdir, fake_server.port, pool)
+    finally:
+        if pool != None:
+            pool.close()
+    assert fake_server.counters["logins"] == logins
+    assert fake_server.counters["hops"] == 3   # the final nodes are still reached with ssh from the jumpbox
+    for node in ("n1", "n2", "n3"):
+        assert f"{node} show b 000002" in read_log(workdir, node)
+
+
+
+def test_tunnel(fake_server, workdir):
+    pool = cp.ConnectionPool(tunnel=True)
+    try:
+        run_configs(workdir, fake_server.port, pool)
+    finally:
+        pool.close()
+    assert fake_server.counters["tunnels"] == 3
+    assert fake_server.counters["hops"] == 0
+    assert fake_server.counters["logins"] == 4   # the jumpbox once, and each final node through its tunnel
+    for node in ("n1", "n2", "n3"):
+        log = read_log(workdir, node)
+        # tunnels are connected back to the fake server, whose first prompt is its own hostname
+        assert "show a 000002" in log and f"{fake_server.hostname} show b 000002" in log
@@ -0,0 +1,100 @@
+import io
+import random
+import functools
+import pytest
+from p_cmd_runr import file_manip as fm
+
+
+
+PIECES = ["\n", "\n\n", " \n", "\t\n", "a\n", "b c\n", "  x  \n", "y", " "]
+
+
+
+def samples(count=3000, seed=1):
+    """
+    Description:
+        Yields the lines of random texts, as read from a text file.
+    """
+    rnd = random.Random(seed)
+    for _ in range(count):
+        text = "".join(rnd.choice(PIECES) for _ in range(rnd.randint(1, 8)))
+        yield io.StringIO(text).readlines()
+
+
+
+def stream(filt, lines):
+    return "".join(filt.feed(line) for line in lines) + filt.flush()
+
+
+
+def test_flattener_matches_flatten():
+    for lines in samples():
+        assert stream(fm.Flattener(), lines) == "".join(fm.flatten(lines))
+
+
+
+def test_squeezer_matches_squeeze():
+    for lines in samples():
+        assert stream(fm.Squeezer(), lines) == functools.reduce(fm.squeeze, lines), lines
+
+
+
+def test_deflater_matches_deflate():
+    for lines in samples():
+        assert stream(fm.Deflater(), lines) == functools.reduce(fm.deflate, lines), lines
+
+
+
+def test_count_from_end():
+    assert fm.count_from_end("") == 0
+    assert fm.count_from_end("abc") == 0
+    assert fm.count_from_end("abc\n\n") == 2
+    assert fm.count_from_end("\n") == 1
+    assert fm.count_from_end("\nabc") == 1
+    assert fm.count_from_end("\n\n\n") == 3
+
+
+
+@pytest.mark.parametrize("func, reference", [
+    (fm.flatten_file, lambda lines: "".join(fm.flatten(lines))),
+    (fm.squeeze_file, lambda lines: functools.reduce(fm.squeeze, lines)),
+    (fm.deflate_file, lambda lines: functools.reduce(fm.deflate, lines)),
+])
+def test_filter_files(tmp_path, func, reference):
+    lines = ["cmd\n", "\n", "\n", "\n", "out 1\n", "\n", "out 2\n", "\n", "\n", "prompt$ "]
+    path = tmp_path / "log.txt"
+    path.write_text("".join(lines), encoding="utf-8")
+    func(str(path))
+    assert path.read_text(encoding="utf-8") == reference(lines)
+
+
+
+def test_filter_file_leaves_undecodable_file(tmp_path):
+    path = tmp_path / "log.txt"
+    data = b"abc\n\n\n\xff\xfe\n"
+    path.write_bytes(data)
+    fm.deflate_file(str(path))
+    assert path.read_bytes() == data
+    assert [p.name for p in tmp_path.iterdir()] == ["log.txt"]
+
+
+
+@pytest.mark.parametrize("func", [fm.flatten_file, fm.squeeze_file, fm.deflate_file])
+def test_filtered_writer_matches_file_function(tmp_path, func):
+    rnd = random.Random(2)
+    text = "".join(rnd.choice(PIECES + ["\r\n", "\r", "prompt$ "]) for _ in range(400))
+    expected = tmp_path / "expected.txt"
+    with open(expected, mode="wt", encoding="utf-8") as fp:
+        fp.write(text)
+    func(str(expected))
+    for seed in range(20):
+        rnd = random.Random(seed)
+        path = tmp_path / "inline.txt"
+        writer = fm.FilteredWriter(open(path, mode="wt", encoding="utf-8"), fm.get_filter(func)())
+        i = 0
+        while i < len(text):
+            n = rnd.randint(1, 12)
+            writer.write(text[i:i + n])
+            i += n
+        writer.close()
+        assert path.read_bytes() == expected.read_bytes()
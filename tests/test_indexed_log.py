@@ -0,0 +1,103 @@
+import random
+import pytest
+from p_cmd_runr import indexed_log as il
+from p_cmd_runr import file_manip as fm
+
+
+
+OUTPUT = [(None, "login banner\r\nn1$ "), ("show a", "show a\r\na1\r\n\r\n\r\nn1$ "), ("show b", "show b\r\nb1\r\n\r\nn1$ ")]
+
+
+
+def write_log(writer, output=OUTPUT):
+    for cmd, text in output:
+        if cmd != None:
+            writer.command(cmd)
+        writer.write(text)
+    writer.close()
+
+
+
+def blocks(filename):
+    return [(e["cmd"], il.read_block(filename, e)) for e in il.read_index(filename)]
+
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd", None])
+def test_round_trip(tmp_path, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    fn = str(tmp_path / ("n1.txt" + il.SUFFIXES.get(compression, "")))
+    write_log(il.IndexedLogWriter(fn, compression))
+    assert blocks(fn) == OUTPUT  # written as received, like a log file that is not compressed
+    assert il.read_command(fn, "show b") == "show b\nb1\n\nn1$ "
+    assert il.read_command(fn, 1) == "show a\na1\n\n\nn1$ "
+    assert il.read_command(fn, "show c") == None
+    with il.open_log(fn) as fp:
+        assert fp.read() == "login banner\nn1$ show a\na1\n\n\nn1$ show b\nb1\n\nn1$ "
+
+
+
+def test_get_compression():
+    assert il.get_compression("n1_18-10-2026_120000.txt.gz") == "gzip"
+    assert il.get_compression("n1_18-10-2026_120000.txt.ZST") == "zstd"
+    assert il.get_compression("n1_18-10-2026_120000.txt") == None
+    assert il.base_name("n1.gz") == "n1"
+    assert il.base_name("n1") == "n1"
+    assert il.read_index("missing.txt.gz") == []
+
+
+
+@pytest.mark.parametrize("filt, expected", [
+    (fm.Flattener, ["login banner\nn1$ ", "show a\na1\nn1$ ", "show b\nb1\nn1$ "]),
+    (fm.Squeezer, ["login banner\nn1$ ", "show a\na1\n\nn1$ ", "show b\nb1\n\nn1$ "]),
+    (fm.Deflater, ["login banner\nn1$ ", "show a\na1\n\nn1$ ", "show b\nb1\nn1$ "]),
+])
+def test_filtered_blocks(tmp_path, filt, expected):
+    fn = str(tmp_path / "n1.txt.gz")
+    write_log(fm.FilteredWriter(il.IndexedLogWriter(fn), filt()))
+    assert blocks(fn) == list(zip([None, "show a", "show b"], expected))
+    assert il.read_command(fn, "show b") == expected[2]
+
+
+
+def random_output(rnd):
+    pieces = ["x\r\n", "\r\n", "\r\n\r\n", "  \r\n", "\r", "\n", "yy ", " "]
+    output = [(None, "banner\r\n" + rnd.choice(["n1$ ", "n1$ \r\n", ""]))]
+    for i in range(rnd.randint(1, 6)):
+        text = f"cmd {i}\r\n" + "".join(rnd.choice(pieces) for _ in range(rnd.randint(0, 8))) + rnd.choice(["n1$ ", "\r", "\r\n", ""])
+        output.append((f"cmd {i}", text))
+    return output
+
+
+
+@pytest.mark.parametrize("func", [fm.flatten_file, fm.squeeze_file, fm.deflate_file])
+def test_filtered_blocks_match_file_function(tmp_path, func):
+    rnd = random.Random(4)
+    for _ in range(300):
+        output = random_output(rnd)
+        raw = str(tmp_path / "raw.txt")
+        with open(raw, mode="wt", encoding="utf-8", newline="") as fp:
+            fp.write("".join(text for cmd, text in output))
+        func(raw)
+        fn = str(tmp_path / "n1.txt.gz")
+        write_log(fm.FilteredWriter(il.IndexedLogWriter(fn), fm.get_filter(func)()), output)
+        with il.open_log(fn) as fp, open(raw, mode="rt", encoding="utf-8") as expected:
+            assert fp.read() == expected.read(), output
+        index = il.read_index(fn)
+        assert [e["cmd"] for e in index if e["cmd"] != None] == [cmd for cmd, text in output if cmd != None]
+        for e in index:
+            if e["cmd"] != None:
+                assert il.read_command(fn, e["cmd"]).startswith(e["cmd"] + "\n"), output
+
+
+
+@pytest.mark.parametrize("func", [fm.flatten_file, fm.squeeze_file, fm.deflate_file])
+def test_filter_file_matches_inline_filter(tmp_path, func):
+    inline = str(tmp_path / "inline.txt.gz")
+    write_log(fm.FilteredWriter(il.IndexedLogWriter(inline), fm.get_filter(func)()))
+    raw = str(tmp_path / "raw.txt.gz")
+    write_log(il.IndexedLogWriter(raw))
+    func(raw)
+    assert blocks(raw) == blocks(inline)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["inline.txt.gz", "inline.txt.gz.idx", "raw.txt.gz", "raw.txt.gz.idx"]
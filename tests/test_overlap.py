@@ -0,0 +1,153 @@
+import random
+from find_overlap import overlap as ov
+from find_overlap.__main__ import find_overlaps
+
+
+
+PRINTOUT_1 = """<ANBSP:B=1-212555;
+B-NUMBER ANALYSIS DATA
+
+OPN   BNT
+1-212        RC=10  CC=1
+1-2125       RC=11  CC=1
+
+1-212555     RC=12
+END
+
+<ANBSP:B=1-31044;
+1-310440  RC=5
+1-3       RC=7
+END
+"""
+
+PRINTOUT_2 = """<ANBSP:B=2-4455;
+2-44      RC=3
+END
+"""
+
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+
+def brute_force(definitions, entries):
+    return sorted((d.source, d.line, e.line) for d in definitions for e in entries
+                  if d.source == e.source and d.series == e.series and d.digits != e.digits and d.digits.startswith(e.digits))
+
+
+
+def test_parse_printout(tmp_path):
+    with open(write(tmp_path, "p1.txt", PRINTOUT_1), mode="rt", encoding="utf-8") as fp:
+        definitions, entries = ov.parse_printout(fp, "p1.txt")
+    assert [(d.series, d.digits, d.line) for d in definitions] == [("1", "212555", 1), ("1", "31044", 11)]
+    assert [(e.digits, e.rc, e.line) for e in entries] == [("212", "10", 5), ("2125", "11", 6), ("212555", "12", 8), ("310440", "5", 12), ("3", "7", 13)]
+
+
+
+def test_overlaps(tmp_path):
+    index = ov.OverlapIndex()
+    index.add_file(write(tmp_path, "p1.txt", PRINTOUT_1))
+    overlaps = index.overlaps()
+    assert [(o.definition, o.entry, o.rc) for o in overlaps] == [("1-212555", "1-212", "10"), ("1-212555", "1-2125", "11"), ("1-31044", "1-3", "7")]
+    assert overlaps[0].header == "ANBSP:B=1-212555"
+    assert overlaps[0].row == "1-212        RC=10"
+
+
+
+def test_overlaps_match_brute_force():
+    rnd = random.Random(3)
+    for _ in range(200):
+        definitions = []
+        entries = []
+        for n in range(rnd.randint(1, 30)):
+            b = ov.BNumber(rnd.choice("ab"), rnd.choice("12"), "".join(rnd.choice("123") for _ in range(rnd.randint(1, 4))), None, "", n)
+            if rnd.random() < 0.3:
+                definitions.append(b)
+            else:
+                entries.append(b._replace(rc=str(n)))
+        index = ov.OverlapIndex()
+        index.add(definitions, entries)
+        found = sorted((o.source, o.definition_line, o.entry_line) for o in index.overlaps())
+        assert found == brute_force(index.definitions, index.entries)
+
+
+
+def test_find_overlaps_prints_under_each_file(tmp_path, capsys):
+    f2 = write(tmp_path, "b.txt", PRINTOUT_2)
+    f1 = write(tmp_path, "a.txt", PRINTOUT_1)
+    overlaps = find_overlaps([f2, f1])
+    assert len(overlaps) == 4
+    assert capsys.readouterr().out == (
+        f"Checking overlaps in {f2}\n"
+        "Overlap:\nANBSP:B=2-4455\n2-44      RC=3\n\n"
+        f"Checking overlaps in {f1}\n"
+        "Overlap:\nANBSP:B=1-212555\n1-212        RC=10\n\n"
+        "Overlap:\nANBSP:B=1-212555\n1-2125       RC=11\n\n"
+        "Overlap:\nANBSP:B=1-31044\n1-3       RC=7\n\n")
+
+
+
+def test_write_report(tmp_path):
+    index = ov.OverlapIndex()
+    index.add_file(write(tmp_path, "p1.txt", PRINTOUT_1))
+    overlaps = index.overlaps()
+    ov.write_report(overlaps, str(tmp_path / "r.csv"))
+    lines = (tmp_path / "r.csv").read_text(encoding="utf-8").splitlines()
+    assert lines[0] == ",".join(ov.Overlap._fields)
+    assert len(lines) == 4
+    ov.write_report(overlaps, str(tmp_path / "r.json"))
+    assert "1-31044" in (tmp_path / "r.json").read_text(encoding="utf-8")
+
+
+
+def chunk_texts(filename, chunks):
+    with open(filename, mode="rb") as fp:
+        data = fp.read()
+    return [data[start:end] for start, end, first_line in chunks]
+
+
+
+def test_split_file_chunk_larger_than_file(tmp_path):
+    fn = write(tmp_path, "p1.txt", PRINTOUT_1)
+    assert ov.split_file(fn, 1 << 20) == [(0, None, 1)]
+    assert ov.split_file(fn, len(PRINTOUT_1)) == [(0, None, 1)]
+
+
+
+def test_split_file_without_trailing_newline(tmp_path):
+    text = PRINTOUT_1 + PRINTOUT_2 + "\n<ANBSP:B=1-2"
+    fn = write(tmp_path, "p1.txt", text)
+    chunks = ov.split_file(fn, 10)
+    assert len(chunks) == 4
+    assert b"".join(chunk_texts(fn, chunks)) == text.encode("utf-8")
+    assert chunk_texts(fn, chunks)[-1] == b"<ANBSP:B=1-2"
+    assert chunks[-1][2] == text.count("\n") + 1
+    definitions, entries = ov.parse_chunk(fn, *chunks[-1])
+    assert [(d.digits, d.line) for d in definitions] == [("2", text.count("\n") + 1)]
+
+
+
+def test_split_file_crlf(tmp_path):
+    fn = str(tmp_path / "p1.txt")
+    with open(fn, mode="wt", encoding="utf-8", newline="\r\n") as fp:
+        fp.write(PRINTOUT_1 * 3)
+    chunks = ov.split_file(fn, 10)
+    assert len(chunks) == 6
+    with open(fn, mode="rt", encoding="utf-8") as fp:
+        expected = ov.parse_printout(fp, fn)
+    parsed = [ov.parse_chunk(fn, *c) for c in chunks]
+    assert [d for p in parsed for d in p[0]] == expected[0]
+    assert [e for p in parsed for e in p[1]] == expected[1]
+
+
+
+def test_scan_files_parallel_matches_single_process(tmp_path):
+    f1 = write(tmp_path, "a.txt", (PRINTOUT_1 + PRINTOUT_2) * 20)
+    f2 = write(tmp_path, "b.txt", PRINTOUT_2 + PRINTOUT_1.rstrip("\n"))
+    expected = ov.scan_files([f1, f2])
+    assert len(expected) == 8  # repeated printouts of a file are only indexed once
+    assert ov.scan_files([f1, f2], jobs=2, chunk_size=100) == expected
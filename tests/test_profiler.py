@@ -0,0 +1,41 @@
+from p_cmd_runr import profiler as pf
+
+
+
+def test_trace_file_round_trip(tmp_path):
+    fn = str(tmp_path / "trace.jsonl")
+    tracer = pf.Tracer(fn)
+    tracer.record("jump", "n1", 0.5, jump_cmd="ssh")
+    tracer.command("n1", "show a", 10.0, 12.0, {"sent": 10.1, "first": 10.6, "last": 11.5, "gap": 0.5, "bytes": 42})
+    tracer.close()
+    records = pf.load_trace(fn)
+    assert records == tracer.records
+    assert records[0]["jump_cmd"] == "ssh"
+    cmd = records[1]
+    assert (cmd["event"], cmd["node"], cmd["cmd"], cmd["wall"], cmd["bytes"]) == ("command", "n1", "show a", 2.0, 42)
+    assert (cmd["first_byte"], cmd["prompt_latency"], cmd["max_gap"]) == (0.5, 0.5, 0.5)
+
+
+
+def test_command_without_output():
+    tracer = pf.Tracer()
+    tracer.command("n1", "show a", 1.0, 1.5, {})
+    cmd = tracer.records[0]
+    assert (cmd["bytes"], cmd["first_byte"], cmd["prompt_latency"], cmd["max_gap"]) == (0, None, None, None)
+
+
+
+def test_summary():
+    tracer = pf.Tracer()
+    tracer.record("parse_config", None, 0.1)
+    tracer.record("jump", "n1", 1.0)
+    tracer.record("jump", "n2", 0.5)
+    tracer.command("n1", "slow cmd", 0.0, 3.0, {"bytes": 10, "last": 2.0})
+    tracer.command("n2", "fast cmd", 0.0, 1.0, {"bytes": 5, "last": 0.5})
+    tracer.record("delay", "n2", 0.25)
+    lines = tracer.summary(top=1).splitlines()
+    assert lines[2].split() == ["command", "2", "4.000", "2.000"]
+    nodes = lines[lines.index("Slowest nodes (top 1):") + 2].split()
+    assert nodes == ["n1", "4.000", "1.000", "3.000", "0.000", "10", "1.000/1.000"]
+    commands = lines[lines.index("Slowest commands (top 1):") + 2:]
+    assert len(commands) == 1 and "slow cmd" in commands[0]
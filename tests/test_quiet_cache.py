@@ -0,0 +1,79 @@
+import json
+from time import perf_counter
+from p_cmd_runr import quiet_cache as qc
+from p_cmd_runr import p_cmd_runr as pcr
+
+
+
+def test_unknown_command_waits_cmd_timeout(tmp_path):
+    cache = qc.QuietCache(str(tmp_path / "cache.json"))
+    assert cache.timeout("n1", "show a", 5.0) == 5.0
+
+
+
+def test_learned_timeout(tmp_path):
+    cache = qc.QuietCache(str(tmp_path / "cache.json"), margin=2.0, min_timeout=0.2)
+    cache.update("n1", "show a", 0.5)
+    cache.update("n1", "show a", 0.3)   # the longest interval is kept
+    cache.update("n1", "show b", 0.01)
+    cache.update("n1", "show c", 10.0)
+    cache.update("n1", "show d", None)  # no output: nothing is learned
+    assert cache.timeout("n1", "show a", 5.0) == 1.0
+    assert cache.timeout("n1", "show b", 5.0) == 0.2
+    assert cache.timeout("n1", "show c", 5.0) == 5.0
+    assert cache.timeout("n1", "show d", 5.0) == 5.0
+    assert cache.timeout("n2", "show a", 5.0) == 5.0
+
+
+
+def test_save_and_load(tmp_path):
+    fn = str(tmp_path / "cache.json")
+    cache = qc.QuietCache(fn)
+    cache.save()
+    assert not (tmp_path / "cache.json").exists()
+    cache.update("n1", qc.LOGIN, 0.1234)
+    cache.save()
+    assert json.loads((tmp_path / "cache.json").read_text(encoding="utf-8")) == {"n1": {qc.LOGIN: 0.123}}
+    assert qc.QuietCache(fn).timeout("n1", qc.LOGIN, 5.0) == 0.246
+    assert [p.name for p in tmp_path.iterdir()] == ["cache.json"]
+
+
+
+def test_invalid_cache_file_is_ignored(tmp_path, capsys):
+    path = tmp_path / "cache.json"
+    path.write_text("{not json", encoding="utf-8")
+    cache = qc.QuietCache(str(path))
+    assert cache.gaps == {}
+    assert "Ignoring invalid cache file" in capsys.readouterr().out
+
+
+
+def test_update_stats():
+    stats = {"sent": perf_counter()}
+    pcr.update_stats(stats, b"abc")
+    pcr.update_stats(stats, b"")
+    pcr.update_stats(stats, b"de")
+    assert stats["bytes"] == 5
+    assert stats["sent"] <= stats["first"] <= stats["last"]
+    assert stats["gap"] >= stats["first"] - stats["sent"]
+    pcr.update_stats(None, b"abc")
+
+
+
+def test_adaptive_run(fake_server, workdir):
+    from conftest import write_config
+    from p_cmd_runr import profiler as pf
+
+    cache = qc.QuietCache(str(workdir / "cache.json"))
+    walls = []
+    for run in range(2):
+        tracer = pf.Tracer()
+        cgo = pcr.ConfigGrabber(write_config(workdir, fake_server.port, ["n1"], cmd_timeout=2))
+        fp = pcr.boxjumper(cgo, len(cgo), blocking=False, tracer=tracer, quiet_cache=cache)
+        if fp:
+            fp.close()
+        walls.append([r["wall"] for r in tracer.records if r["event"] == "command"])
+    assert min(walls[0]) >= 2
+    assert max(walls[1]) < 1.5
+    for log in workdir.glob("n1_*.txt"):
+        assert "n1 show b 000002" in log.read_text(encoding="utf-8")